@@ -15,6 +15,9 @@ from .widgets_ops import *
 from .widgets_ui import *
 from .rigify_ui import *
 from .props import BendifySceneSettings
+from .utils.widgets_index import widget_index_register, widget_index_unregister
+from .utils.widgets_lod import widget_lod_register, widget_lod_unregister
+from .utils.layers import layer_cache_register, layer_cache_unregister
 
 classes = (
     BENDIFY_OT_AlmToggle,
@@ -25,6 +28,8 @@ classes = (
     BENDIFY_OT_DrawBlendSwitch,
     BENDIFY_OT_ReparentObjectsToBones,
     BENDIFY_OT_ForceDriversUpdate,
+    BENDIFY_OT_BendyDriversBake,
+    BENDIFY_OT_BendyDriversRestore,
     BENDIFY_OT_StretchToReset,
     BENDIFY_OT_ConstraintsMirror,
     BENDIFY_OT_ConstraintsAddArmature,
@@ -32,12 +37,15 @@ classes = (
     BENDIFY_OT_MaterialSlotsSwitch,
     BENDIFY_OT_MirrorAllWeights,
     BENDIFY_OT_RigifyCopyToSelected,
+    BENDIFY_OT_RigCostExport,
     BENDIFY_OT_WidgetsSelect,
     BENDIFY_OT_WidgetsBevel,
     BENDIFY_OT_WidgetsEditStart,
     BENDIFY_OT_WidgetsEditStop,
     BENDIFY_OT_WidgetsNamesFix,
     BENDIFY_OT_WidgetsRemoveUnused,
+    BENDIFY_OT_WidgetsExport,
+    BENDIFY_OT_WidgetsImport,
     BENDIFY_OT_AddBoneGroups,
     BENDIFY_PT_ArmatureLayerManagerViewport,
     BENDIFY_PT_BoneGroups,
@@ -54,7 +62,13 @@ def register():
     for c in classes:
         register_class(c)
     Scene.bendify = PointerProperty(type=BendifySceneSettings, name="Bendify Settings")
+    widget_index_register()
+    widget_lod_register()
+    layer_cache_register()
 
 def unregister():
+    layer_cache_unregister()
+    widget_lod_unregister()
+    widget_index_unregister()
     for c in classes:
         unregister_class(c)
\ No newline at end of file
@@ -1,32 +1,27 @@
 import bpy
 
+from .utils.layers import armature_cache, bone_flags, bone_layers, is_metarig, layer_cache
+
 class AlmMixIn():
     """Mix-in class for armature layer manager objects, providing poll and armature identification"""
     
     def arma_single(self, context):
         '''Check if there is only one armature in the scene and return object if so'''
-        arma_objs = [obj for obj in context.scene.objects if obj.type == 'ARMATURE']
+        arma_objs = armature_cache.objects(context.scene)[0]
         if len(arma_objs) == 1:
             return arma_objs[0]
 
     def arma(self, context):
         '''Return the most definitive armature object candidate'''
-        pin = context.scene.bendify.alm_pin
-        act = context.active_object
-        if pin:
-            return pin
-        elif self.arma_single(context):
-            return self.arma_single(context)
-        elif act and act.type == 'ARMATURE':
-            return act
+        return armature_cache.resolve(context, self.resolve)[0]
     
     def meta_check(self, obj):
         '''Check if obj is metarig'''
-        return hasattr(obj.data, 'rigify_layers') and len(obj.data.rigify_layers) >= 29
+        return is_metarig(obj)
 
     def meta_any(self, context):
         '''Return all metarigs (data) in the scene'''
-        return [obj for obj in context.scene.objects if obj.type == 'ARMATURE' and self.meta_check(obj)]
+        return armature_cache.objects(context.scene)[1]
 
     def meta_single(self, context):
         '''Check if there is only one metarig in the scene and return object if so'''
@@ -36,18 +31,41 @@ class AlmMixIn():
 
     def meta(self, context):
         '''Return the most definitive metarig candidate'''
-        meta = context.scene.bendify.alm_meta
+        return armature_cache.resolve(context, self.resolve)[1]
+
+    def resolve(self, context):
+        '''Find the armature and metarig candidates, cached per scene, pins and active object'''
+        bendify = context.scene.bendify
         act = context.active_object
-        arma = self.arma(context)
-        if meta:
-            return meta
+
+        if bendify.alm_pin:
+            arma = bendify.alm_pin
+        elif self.arma_single(context):
+            arma = self.arma_single(context)
+        elif act and act.type == 'ARMATURE':
+            arma = act
+        else:
+            arma = None
+
+        if bendify.alm_meta:
+            meta = bendify.alm_meta
         elif self.meta_single(context):
-            return self.meta_single(context)
+            meta = self.meta_single(context)
         elif arma and self.meta_check(arma):
-            return arma
+            meta = arma
         elif act and act.type == 'ARMATURE' and self.meta_check(act):
-            return act
+            meta = act
+        else:
+            meta = None
+        return arma, meta
     
+    def bones_update(self, context, data):
+        '''Tag armature data and viewport after bulk bone writes, foreach_set skips RNA updates'''
+        data.update_tag()
+        layer_cache.tag(data)
+        if context.area:
+            context.area.tag_redraw()
+
     def bendify(self, context):
         return context.scene.bendify
     
@@ -101,24 +119,21 @@ class BENDIFY_OT_AlmSelect(bpy.types.Operator, AlmMixIn):
         return AlmMixIn.poll_active(self, context)
 
     def execute(self, context):
-        def bone_select(bone, select):
-            bone.select = select
-            bone.select_head = select
-            bone.select_tail = select
-        
         obj = self.arma(context)
         if context.mode == 'EDIT_ARMATURE':
             bones = obj.data.edit_bones
         else:
             bones = obj.data.bones
         
-        for bone in bones:
-            if bone.layers[self.layer]:
-                bone_select(bone, self.select)
-            else:
-                if self.new:
-                    bone_select(bone, False)
-
+        in_layer = bone_layers(bones)[:, self.layer]
+        for attribute in ('select', 'select_head', 'select_tail'):
+            select = bone_flags(bones, attribute)
+            select[in_layer] = self.select
+            if self.new:
+                select[~in_layer] = False
+            bones.foreach_set(attribute, select)
+
+        self.bones_update(context, obj.data)
         return {"FINISHED"}
 
 class BENDIFY_OT_AlmLock(bpy.types.Operator, AlmMixIn):
@@ -135,24 +150,24 @@ class BENDIFY_OT_AlmLock(bpy.types.Operator, AlmMixIn):
 
     def execute(self, context):
         obj = self.arma(context)
-        lock = True
-        mode = False
         if context.mode == 'EDIT_ARMATURE':
-            mode = True
-            bpy.ops.object.mode_set(mode='POSE')
-        for bone in obj.data.bones:
-            if bone.layers[self.layer]:
-                if bone.hide_select:
-                    lock = False
-        for bone in obj.data.bones:
-            if bone.layers[self.layer]:
-                if lock:
-                    bone.select = False
-                    bone.select_head = False
-                    bone.select_tail = False
-                bone.hide_select = lock
-        if mode:
-            bpy.ops.object.mode_set(mode='EDIT')
+            bones = obj.data.edit_bones
+        else:
+            bones = obj.data.bones
+
+        # Lock unless any bone in the layer is locked already
+        in_layer = bone_layers(bones)[:, self.layer]
+        hide_select = bone_flags(bones, 'hide_select')
+        lock = not hide_select[in_layer].any()
+        if lock:
+            for attribute in ('select', 'select_head', 'select_tail'):
+                select = bone_flags(bones, attribute)
+                select[in_layer] = False
+                bones.foreach_set(attribute, select)
+        hide_select[in_layer] = lock
+        bones.foreach_set('hide_select', hide_select)
+
+        self.bones_update(context, obj.data)
         return {"FINISHED"}
 
 class BENDIFY_OT_AlmAdd(bpy.types.Operator, AlmMixIn):
@@ -170,16 +185,24 @@ class BENDIFY_OT_AlmAdd(bpy.types.Operator, AlmMixIn):
             return context.selected_bones or context.selected_pose_bones_from_active_object
 
     def execute(self, context):
+        data = context.active_object.data
         if context.mode == 'POSE':
-            bones = [context.active_object.data.bones[b.name] for b in context.selected_pose_bones_from_active_object]
+            bones = data.bones
+            selected = context.selected_pose_bones_from_active_object
         else:
-            bones = context.selected_bones
-        for bone in bones:
-            bone.layers[self.layer] = True
-            if self.move:
-                for i in range(31):
-                    if not i == self.layer:
-                        bone.layers[i] = False
+            bones = data.edit_bones if context.mode == 'EDIT_ARMATURE' else data.bones
+            selected = context.selected_bones
+        # Multi-object edit mode also lists bones of other armatures
+        indices = [bones.find(b.name) for b in selected if b.id_data in (data, context.active_object)]
+        indices = [i for i in indices if i >= 0]
+
+        layers = bone_layers(bones)
+        if self.move:
+            layers[indices, :31] = False
+        layers[indices, self.layer] = True
+        bones.foreach_set('layers', layers.ravel())
+
+        self.bones_update(context, data)
         return {"FINISHED"}
 
 class BENDIFY_OT_AlmSolo(bpy.types.Operator, AlmMixIn):
@@ -1,14 +1,18 @@
 import bpy
 from .alm_ops import AlmMixIn
+from .utils.layers import layer_cache
 
 class ArmatureLayerManagerPanel(AlmMixIn):
     """Armature Layer Panel drawing class"""    
 
+    def layer_data(self, context):
+        '''Cached layer occupancy of the armature'''
+        obj = self.arma(context)
+        return layer_cache.get(obj.data, context.mode == 'EDIT_ARMATURE')
+
     def layers_get(self, context):
         '''Returns a list of layer numbers to draw'''
         bendify = self.bendify(context)
-        obj = self.arma(context)
-        data = obj.data
 
         # Show empty layers
         if bendify.alm_empty:
@@ -16,19 +20,8 @@ class ArmatureLayerManagerPanel(AlmMixIn):
         
         # Show only layers containing bones
         else:
-            layers = []
-            # Edit bones for edit mode
-            if context.mode == 'EDIT_ARMATURE':
-                bones = data.edit_bones
-            # Regular bones otherwise
-            else:
-                bones = data.bones
-            for bone in bones:
-                for i, layer in enumerate(bone.layers):
-                    if layer and i not in layers:
-                        layers.append(i)
-            layers.sort()
-            return layers
+            used = self.layer_data(context).used
+            return [i for i in range(32) if used & 1 << i]
 
     def pins(self, context):
         '''UI for the armature and metarig pins'''
@@ -62,8 +55,8 @@ class ArmatureLayerManagerPanel(AlmMixIn):
                 icon='PINNED' if bendify.alm_meta else 'UNPINNED',
             )
 
-    def toggles(self, context, layout):
-        '''UI for "Empty" and "Compact" toggles (for buttons & edit)'''
+    def toggles(self, context, layout, stats=False):
+        '''UI for "Empty", "Compact" and optional "Stats" toggles (for buttons & edit)'''
         bendify = self.bendify(context)
 
         row = layout.row(align=True)
@@ -85,6 +78,16 @@ class ArmatureLayerManagerPanel(AlmMixIn):
             expand=True
         )
 
+        # Statistics
+        if stats:
+            row.prop(
+                bendify,
+                'alm_stats',
+                text="Stats",
+                icon='INFO',
+                expand=True
+            )
+
         layout.row().separator()
 
     def settings(self, context):
@@ -146,45 +149,47 @@ class ArmatureLayerManagerPanel(AlmMixIn):
         box = layout.box()
         col = box.column()
 
-        self.toggles(context, col)
+        self.toggles(context, col, stats=context.mode != 'EDIT_ARMATURE')
+
+        # Per-layer statistics column with rig totals as header
+        # Hidden in edit mode, edit bone changes are not in the bones yet
+        show_stats = bendify.alm_stats and context.mode != 'EDIT_ARMATURE'
+        stats = layer_cache.statistics(obj) if show_stats else None
+        if stats:
+            for text, values in (("", stats.fields), ("Total", stats.totals)):
+                split = col.row().split(factor=0.5)
+                split.label(text=text)
+                header = split.row(align=True)
+                for value in values:
+                    header.label(text=str(value))
+
+        # Layer bitmasks of the active and selected bones
+        layer_data = self.layer_data(context)
+        act_b = context.active_bone
+        act_pb = context.active_pose_bone
+        bones = data.bones
+        if context.mode == 'EDIT_ARMATURE':
+            active = layer_data.bone_mask(data.edit_bones, act_b.name if act_b else None)
+            selected = layer_data.selected
+        elif context.mode == 'POSE':
+            active = layer_data.bone_mask(bones, act_pb.name if act_pb else None) \
+                or layer_data.bone_mask(bones, act_b.name if act_b else None)
+            selected = layer_data.selected
+        else:
+            active = layer_data.bone_mask(bones, act_b.name if act_b else None)
+            selected = 0
 
         for i in self.layers_get(context):
-            act_b = context.active_bone
-            act_pb = context.active_pose_bone
-            bones = data.bones
-            
-            # Check for edit bones in this layer               
-            if context.mode == 'EDIT_ARMATURE':
-                if act_b and act_b.layers[i]:
-                    layer_icon = 'RADIOBUT_ON'
-                    empty = False
-                elif any(b.layers[i] for b in context.selected_editable_bones):
-                    layer_icon = 'LAYER_ACTIVE'
-                    empty = False
-                elif any(b.layers[i] for b in data.edit_bones):
-                    layer_icon = 'LAYER_USED'
-                    empty = False
-                else:
-                    layer_icon = 'BLANK1'
-                    empty = True
-            
-            # Same for regular bones in other modes
+            bit = 1 << i
+            empty = not layer_data.counts[i]
+            if active & bit:
+                layer_icon = 'RADIOBUT_ON'
+            elif selected & bit:
+                layer_icon = 'LAYER_ACTIVE'
+            elif not empty:
+                layer_icon = 'LAYER_USED'
             else:
-                if context.mode == 'POSE' and act_pb and act_pb.name in bones and bones[act_pb.name].layers[i]:
-                    layer_icon = 'RADIOBUT_ON'
-                    empty = False
-                elif act_b and act_b.name in bones and bones[act_b.name].layers[i]:
-                    layer_icon = 'RADIOBUT_ON'
-                    empty = False
-                elif context.mode == 'POSE' and any(bones[b.name].layers[i] for b in context.selected_pose_bones_from_active_object if b.name in bones):
-                    layer_icon = 'LAYER_ACTIVE'
-                    empty = False
-                elif any(b.layers[i] for b in bones):
-                    layer_icon = 'LAYER_USED'
-                    empty = False
-                else:
-                    layer_icon = 'BLANK1'
-                    empty = True
+                layer_icon = 'BLANK1'
             
             # Use for rigify layer names or layer number
             if meta and meta.data.rigify_layers:
@@ -202,7 +207,14 @@ class ArmatureLayerManagerPanel(AlmMixIn):
                 layer_name = "Layer " + str(i + 1).zfill(2)
             
             # Start the row
-            row = col.row(align=True)
+            if stats:
+                split = col.row().split(factor=0.5)
+                row = split.row(align=True)
+                values = split.row(align=True)
+                for value in stats.layers[i]:
+                    values.label(text=str(value))
+            else:
+                row = col.row(align=True)
 
             # Selection buttons
             # New selection
@@ -243,14 +255,8 @@ class ArmatureLayerManagerPanel(AlmMixIn):
                 add.move = False
 
                 # Lock button
-                unlocked = 0
-                locked = 0
-                for bone in bones:
-                    if bone.layers[i]:
-                        if bone.hide_select:
-                            locked += 1
-                        else:
-                            unlocked += 1
+                locked = layer_data.locked[i]
+                unlocked = layer_data.counts[i] - locked
                 if unlocked + locked > 0:
                     if not locked:
                         lock_icon = 'UNLOCKED'
@@ -332,20 +338,19 @@ class ArmatureLayerManagerPanel(AlmMixIn):
 
         col = layout.box().column()
         if meta:
-            for i in range(28):
-                buttons = []
-                for r in range(28):
-                    r_layer = meta.data.rigify_layers[r]
-                    if r_layer.row == i and r_layer.name.replace(" ",""): #bone_check(obj, r):
-                        buttons.append([r, r_layer.name])
-                if buttons:
-                    split = col.row().split()
-                for b in buttons:
-                    split.row().prop(obj.data, 'layers', index=b[0], text=b[1], toggle=True)
+            # Layers without bones in the armature are drawn inactive
+            rigify_layout = layer_cache.layout(meta.data)
+            used = self.layer_data(context).used
+            for buttons in rigify_layout.rows:
+                split = col.row().split()
+                for i, name, group in buttons:
+                    row = split.row()
+                    row.active = bool(used & 1 << i)
+                    row.prop(obj.data, 'layers', index=i, text=name, toggle=True)
             
             col.row().separator()
             col.row().separator()
-            col.row().prop(obj.data, 'layers', index=28, text=meta.data.rigify_layers[28].name, toggle=True)
+            col.row().prop(obj.data, 'layers', index=28, text=rigify_layout.bottom, toggle=True)
         else:
             col.row().label(text="Metarig not found", icon='ERROR')
 
@@ -0,0 +1,218 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+"""
+Headless batch rig generation.
+
+Generates a list of metarigs, each in its own background Blender process,
+saves the generated rigs back into their files and writes a JSON report.
+
+    blender -b --python batch_generate.py -- \\
+        --jobs 4 --report report.json char_a.blend:metarig char_b.blend:metarig
+
+Jobs are given as FILE.blend:METARIG; the metarig name may be omitted if the
+file contains a single metarig. Can also be run with a plain Python
+interpreter, with --blender pointing at the Blender executable.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+
+#=============================================
+# Arguments
+#=============================================
+
+def script_args(argv):
+    '''Arguments after "--" when run inside Blender, all otherwise'''
+    if '--' in argv:
+        return argv[argv.index('--') + 1:]
+    return [] if 'bpy' in sys.modules else argv[1:]
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Generate Rigify metarigs in parallel background processes")
+    parser.add_argument('jobs_list', nargs='*', metavar="FILE.blend[:METARIG]", help="Metarigs to generate")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Number of Blender processes")
+    parser.add_argument('-r', '--report', default="bendify_batch_report.json", help="JSON report path")
+    parser.add_argument('-b', '--blender', default=None, help="Blender executable")
+    parser.add_argument('--no-save', action='store_true', help="Generate without saving the files")
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--result', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+def split_job(job):
+    '''FILE.blend[:METARIG] -> (file, metarig)'''
+    path, sep, metarig = job.rpartition(':')
+    if not sep or not path.lower().endswith('.blend'):
+        return job, None
+    return path, metarig or None
+
+#=============================================
+# Worker (inside Blender)
+#=============================================
+
+def find_metarig(name):
+    import bpy
+
+    if name:
+        obj = bpy.data.objects.get(name)
+        if not obj or obj.type != 'ARMATURE':
+            raise ValueError("Metarig not found: " + name)
+        return obj
+    metarigs = [
+        o for o in bpy.data.objects if o.type == 'ARMATURE'
+        and o.data.get("rig_id") is None
+        and any(pb.rigify_type for pb in o.pose.bones)
+    ]
+    if len(metarigs) != 1:
+        raise ValueError("Expected exactly one metarig, found {}".format(len(metarigs)))
+    return metarigs[0]
+
+def generate(metarig_name, save=True):
+    '''Generate a single metarig of the open file'''
+    import addon_utils
+    import bpy
+
+    addon_utils.enable('rigify', default_set=True)
+    from rigify import generate as rigify_generate
+
+    metarig = find_metarig(metarig_name)
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+    bpy.context.view_layer.objects.active = metarig
+    metarig.select_set(True)
+    if metarig.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    start = perf_counter()
+    rigify_generate.generate_rig(bpy.context, metarig)
+    result = {
+        "metarig": metarig.name,
+        "rig": getattr(metarig.data.rigify_target_rig, 'name', None),
+        "generate": perf_counter() - start,
+    }
+
+    if save:
+        start = perf_counter()
+        bpy.ops.wm.save_mainfile()
+        result["save"] = perf_counter() - start
+    return result
+
+def run_worker(args):
+    import bpy
+
+    result = {"file": bpy.data.filepath}
+    try:
+        result.update(generate(args.worker or None, not args.no_save))
+        result["error"] = None
+    except Exception as e:
+        result["error"] = "{}: {}".format(e.__class__.__name__, e)
+
+    with open(args.result, 'w') as f:
+        json.dump(result, f)
+
+#=============================================
+# Dispatcher
+#=============================================
+
+def blender_binary(args):
+    if args.blender:
+        return args.blender
+    try:
+        import bpy
+        return bpy.app.binary_path
+    except ImportError:
+        return "blender"
+
+def run_job(blender, job, save):
+    '''Generate one FILE.blend:METARIG in a fresh background Blender'''
+    path, metarig = split_job(job)
+    handle, result_path = tempfile.mkstemp(suffix=".json", prefix="bendify_")
+    os.close(handle)
+
+    command = [
+        blender, '-b', '--factory-startup', path,
+        '--python', os.path.abspath(__file__), '--',
+        '--worker', metarig or "", '--result', result_path,
+    ]
+    if not save:
+        command.append('--no-save')
+
+    start = perf_counter()
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    result = {"job": job, "file": path, "metarig": metarig}
+    try:
+        with open(result_path) as f:
+            result.update(json.load(f))
+    except (OSError, ValueError):
+        result["error"] = "Blender exited with code {}".format(process.returncode)
+        result["log"] = process.stdout[-4000:]
+    finally:
+        os.remove(result_path)
+    result["total"] = perf_counter() - start
+    return result
+
+def run_batch(args):
+    if not args.jobs_list:
+        print("Nothing to generate")
+        return 1
+
+    blender = blender_binary(args)
+    start = perf_counter()
+    # Every job runs in its own Blender process, threads only wait on them
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(lambda job: run_job(blender, job, not args.no_save), args.jobs_list))
+
+    errors = [r for r in results if r.get("error")]
+    report = {
+        "total": perf_counter() - start,
+        "processes": args.jobs,
+        "generated": len(results) - len(errors),
+        "failed": len(errors),
+        "results": results,
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        print("{:<60}{:>10}  {}".format(r["job"], "{:.2f}s".format(r["total"]), r.get("error") or "OK"))
+    print("Bendify batch: {} generated, {} failed in {:.2f}s, report written to {}".format(
+        report["generated"], report["failed"], report["total"], args.report
+    ))
+    return 1 if errors else 0
+
+
+def main(argv):
+    args = parse_args(script_args(argv))
+    if args.worker is not None:
+        run_worker(args)
+        return 0
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -21,6 +21,7 @@
 import bpy
 
 from itertools import count
+from weakref import WeakKeyDictionary
 
 from rigify.base_rig import BaseRig, stage
 from rigify.utils.naming import strip_org, make_derived_name
@@ -30,12 +31,18 @@ from rigify.utils.rig import connected_children_names
 from rigify.utils.bones import put_bone, copy_bone_position, align_bone_roll, align_bone_x_axis, align_bone_y_axis
 from rigify.utils.widgets_basic import create_sphere_widget
 
-from .utils.bones import align_bone, align_bone_to_bone_axis, distance, real_bone
-from .utils.mechanism import make_armature_constraint
+from .utils.bones import adaptive_segments, align_bone, align_bone_to_bone_axis, bbone_handle_inherit, bone_kdtree, \
+deform_vertex_counts, distance, real_bone
+from .utils.mechanism import make_armature_constraint, lod_rig, make_lod_segments_driver, make_lod_stretch_drivers
 from .utils.misc import threewise_nozip, attribute_return
+from .utils.plugins import register_rig_plugins
 from .utils.widgets_bendy import create_sub_tweak_widget, create_simple_arrow_widget
 
 
+# Parent rig -> (tweak names, KD-tree), shared by all children connecting to its tweaks
+_tweak_kdtrees = WeakKeyDictionary()
+
+
 class BendyBoneMixin():
     """
     Bone utilities for Bendy Rigs
@@ -140,10 +147,17 @@ class BendyRig(BaseRig, BendyBoneMixin):
         
         self.bbones_copy_properties = self.params.bbones_copy_properties
         self.bbone_segments = self.params.bbones_spine
+        self.bbones_adaptive = self.params.bbones_adaptive
+        self.bbones_adaptive_vertices = self.params.bbones_adaptive_vertices
+        self.bbones_min = self.params.bbones_min
+        self.bbones_max = max(self.params.bbones_max, self.bbones_min)
+        self.bbones_budget = self.params.bbones_budget
+        self.bbones_lod = self.params.bbones_lod
         self.bbone_easein = self.params.bbones_easein
         self.bbone_easeout = self.params.bbones_easeout
         self.bbone_ease = self.params.bbone_ease
         self.bbone_scale = self.params.bbone_scale
+        self.bbone_handle_native = self.params.bbone_handle_native
 
         self.rotation_mode_tweak = self.params.rotation_mode_tweak
         self.org_transform = self.params.org_transform
@@ -155,6 +169,8 @@ class BendyRig(BaseRig, BendyBoneMixin):
         self.root_bone = self.get_bone(self.base_bone).parent.name if self.get_bone(self.base_bone).parent else "root"
         self.default_prop_bone = None
 
+        register_rig_plugins(self)
+
     def parent_bones(self):
         self.rig_parent_bone = self.get_bone_parent(self.bones.org[0])
 
@@ -268,6 +284,10 @@ class BendyRig(BaseRig, BendyBoneMixin):
             None if handle_end else bbs.bbone_handle_type_end
         )
 
+    def bbone_handle_inherit(self, bone, handle, end=False, scale=False, ease=False):
+        '''Use native B-Bone handle inheritance instead of drivers, if enabled and identical'''
+        return self.bbone_handle_native and bbone_handle_inherit(self.obj, bone, handle, end, scale, ease)
+
     def drivers_bbone_ease(self, bone, handle_start, handle_end):
         pbone = self.get_bone(bone)
         space = 'LOCAL_SPACE'
@@ -276,45 +296,47 @@ class BendyRig(BaseRig, BendyBoneMixin):
         ####################################################
         # Easing
 
-        self.make_driver(
-            pbone,
-            'bbone_easein',
-            expression='scale_y - 1',
-            variables={
-                'scale_y': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_start,
-                            'transform_type': 'SCALE_Y',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_start, ease=True):
+            self.make_driver(
+                pbone,
+                'bbone_easein',
+                expression='scale_y - 1',
+                variables={
+                    'scale_y': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_start,
+                                'transform_type': 'SCALE_Y',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
-        self.make_driver(
-            pbone,
-            'bbone_easeout',
-            expression='scale_y - 1',
-            variables={
-                'scale_y': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_end,
-                            'transform_type': 'SCALE_Y',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_end, end=True, ease=True):
+            self.make_driver(
+                pbone,
+                'bbone_easeout',
+                expression='scale_y - 1',
+                variables={
+                    'scale_y': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_end,
+                                'transform_type': 'SCALE_Y',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
     def drivers_bbone_scale(self, bone, handle_start, handle_end):
         pbone = self.get_bone(bone)
@@ -324,84 +346,88 @@ class BendyRig(BaseRig, BendyBoneMixin):
         ####################################################
         # Scale X
 
-        self.make_driver(
-            pbone,
-            'bbone_scaleinx',
-            variables={
-                'scale_x': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_start,
-                            'transform_type': 'SCALE_X',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_start, scale=True):
+            self.make_driver(
+                pbone,
+                'bbone_scaleinx',
+                variables={
+                    'scale_x': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_start,
+                                'transform_type': 'SCALE_X',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
-        self.make_driver(
-            pbone,
-            'bbone_scaleoutx',
-            variables={
-                'scale_x': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_end,
-                            'transform_type': 'SCALE_X',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_end, end=True, scale=True):
+            self.make_driver(
+                pbone,
+                'bbone_scaleoutx',
+                variables={
+                    'scale_x': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_end,
+                                'transform_type': 'SCALE_X',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
         ####################################################
         # Scale Z
 
-        self.make_driver(
-            pbone,
-            'bbone_scaleiny',
-            variables={
-                'scale_z': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_start,
-                            'transform_type': 'SCALE_Z',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_start, scale=True):
+            self.make_driver(
+                pbone,
+                'bbone_scaleiny',
+                variables={
+                    'scale_z': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_start,
+                                'transform_type': 'SCALE_Z',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
-        self.make_driver(
-            pbone,
-            'bbone_scaleouty',
-            variables={
-                'scale_z': {
-                    'type': v_type,
-                    'targets':
-                    [
-                        {
-                            'id': self.obj,
-                            'bone_target': handle_end,
-                            'transform_type': 'SCALE_Z',
-                            'transform_space': space,
-                        }
-                    ]
+        if not self.bbone_handle_inherit(bone, handle_end, end=True, scale=True):
+            self.make_driver(
+                pbone,
+                'bbone_scaleouty',
+                variables={
+                    'scale_z': {
+                        'type': v_type,
+                        'targets':
+                        [
+                            {
+                                'id': self.obj,
+                                'bone_target': handle_end,
+                                'transform_type': 'SCALE_Z',
+                                'transform_space': space,
+                            }
+                        ]
+                    }
                 }
-            }
-        )
+            )
 
     ####################################################
     # Tweak chain
@@ -488,16 +514,34 @@ class BendyRig(BaseRig, BendyBoneMixin):
         self.parent_bone_chain(deforms, use_connect=True)
         self.set_bone_parent(deforms[0], self.root_bone)
 
+    def deform_segments(self):
+        '''B-Bone segments per deform bone, adaptive to length and weighted vertices if enabled'''
+        deforms = self.bones.deform
+        if not self.bbones_adaptive:
+            return [self.bbone_segments] * len(deforms)
+
+        weights = [self.get_bone(org).length for org in self.bones.org[:len(deforms)]]
+        if self.bbones_adaptive_vertices:
+            counts = getattr(self.generator, 'bendify_vertex_counts', None)
+            if counts is None:
+                counts = self.generator.bendify_vertex_counts = deform_vertex_counts(self.obj)
+            vertices = [counts.get(deform, 0) for deform in deforms]
+            if any(vertices):
+                weights = [w * v for w, v in zip(weights, vertices)]
+
+        return adaptive_segments(weights, self.bbone_segments, self.bbones_min, self.bbones_max, self.bbones_budget)
+
     @stage.parent_bones
     def bbone_deform_chain(self):
         tweaks = self.bones.ctrl.tweak
+        segments = self.deform_segments()
         for i, deform, tweak, next_tweak, org in zip(count(0), self.bones.deform, tweaks, tweaks[1:], self.bones.org):
             if self.bbones_copy_properties:
                 self.copy_bbone(deform, org)
             else:
                 ease_in = 0.0 if i == 0 and not self.bbone_easein else 1.0
                 ease_out = 0.0 if i == len(self.bones.deform) - 1 and not self.bbone_easeout else 1.0
-                self.setup_bbone(deform, self.bbone_segments, ease_in, ease_out, tweak, next_tweak)
+                self.setup_bbone(deform, segments[i], ease_in, ease_out, tweak, next_tweak)
 
     @stage.rig_bones
     def rig_deform_chain(self):
@@ -523,6 +567,14 @@ class BendyRig(BaseRig, BendyBoneMixin):
         for args in zip(self.bones.deform, ctrls.tweak, ctrls.tweak[1:]):
             self.drivers_deform_bone(*args)
     
+    @stage.rig_bones
+    def drivers_lod_deform_chain(self):
+        if self.bbones_lod:
+            lod_bone = lod_rig(self, self.bones.ctrl.flatten())
+            for deform in self.bones.deform:
+                make_lod_segments_driver(self, lod_bone, deform, self.bbones_lod)
+                make_lod_stretch_drivers(self, lod_bone, deform)
+
     def drivers_deform_bone(self, bone, handle_start, handle_end):
         if self.bbone_ease:
             self.drivers_bbone_ease(bone, handle_start, handle_end)
@@ -539,12 +591,25 @@ class BendyRig(BaseRig, BendyBoneMixin):
         r = layout.row(align=True)
         r.prop(params, 'bbone_ease', text="Ease Drivers", toggle=True)
         r.prop(params, 'bbone_scale', text="Scale Drivers", toggle=True)
+        r.prop(params, 'bbone_handle_native', text="", icon='HANDLE_ALIGNED')
         layout.row().prop(params, 'bbones_copy_properties')
         if not params.bbones_copy_properties:
-            layout.row().prop(params, 'bbones_spine')
+            r = layout.row(align=True)
+            r.prop(params, 'bbones_spine')
+            r.prop(params, 'bbones_adaptive', text="", icon='MOD_LENGTH')
+            if params.bbones_adaptive:
+                r.prop(params, 'bbones_adaptive_vertices', text="", icon='VERTEXSEL')
+                r = layout.row(align=True)
+                r.alert = params.bbones_min > params.bbones_max
+                r.prop(params, 'bbones_min', text="Min")
+                r.prop(params, 'bbones_max', text="Max")
+                r.prop(params, 'bbones_budget', text="Budget")
+                if r.alert:
+                    layout.row().label(text="Min exceeds Max, Max is raised to Min", icon='ERROR')
             r = layout.row(align=True)
             r.prop(params, 'bbones_easein', text="Ease In", toggle=True)
             r.prop(params, 'bbones_easeout', text="Ease Out", toggle=True)
+        layout.row().prop(params, 'bbones_lod')
 
     def volume_ui(self, layout, params):
         r = layout.row(align=True)
@@ -583,6 +648,49 @@ class BendyRig(BaseRig, BendyBoneMixin):
             description="Number of B-Bone segments"
         )
 
+        params.bbones_adaptive = bpy.props.BoolProperty(
+            name="Adaptive B-Bone Segments",
+            default=False,
+            description="Scale segments per bone by its length relative to the chain; the average bone gets the set amount"
+        )
+
+        params.bbones_adaptive_vertices = bpy.props.BoolProperty(
+            name="Weight by Vertices",
+            default=False,
+            description="Also scale segments by the number of vertices weighted to each deform bone in meshes bound to the rig"
+        )
+
+        params.bbones_min = bpy.props.IntProperty(
+            name="Minimum B-Bone Segments",
+            default=1,
+            min=1,
+            max=32,
+            description="Minimum number of adaptive B-Bone segments per bone"
+        )
+
+        params.bbones_max = bpy.props.IntProperty(
+            name="Maximum B-Bone Segments",
+            default=32,
+            min=1,
+            max=32,
+            description="Maximum number of adaptive B-Bone segments per bone"
+        )
+
+        params.bbones_budget = bpy.props.IntProperty(
+            name="B-Bone Segment Budget",
+            default=0,
+            min=0,
+            description="Maximum number of adaptive B-Bone segments for the whole chain. 0 for no limit"
+        )
+
+        params.bbones_lod = bpy.props.IntProperty(
+            name="LOD B-Bone Segments",
+            default=0,
+            min=0,
+            max=32,
+            description="B-Bone segments of deform bones while the rig-wide Playback LOD switch is on. 0 to disable"
+        )
+
         params.bbones_easein = bpy.props.BoolProperty(
             name="B-Bone Ease In",
             default=True,
@@ -607,6 +715,12 @@ class BendyRig(BaseRig, BendyBoneMixin):
             description="B-Bone scaling driven by tweak"
         )
 
+        params.bbone_handle_native = bpy.props.BoolProperty(
+            name="Native Handle Scaling",
+            default=False,
+            description="Inherit B-Bone ease and scale from the tweak handles without drivers where the deformation is identical"
+        )
+
         params.rotation_mode_tweak = bpy.props.EnumProperty(
             name="Default Tweak Controller Rotation Mode",
             items=self.rotation_modes,
@@ -761,6 +875,7 @@ class HandleBendyRig(BendyRig):
     @stage.parent_bones
     def bbone_deform_chain(self):
         tweaks = self.bones.ctrl.tweak
+        segments = self.deform_segments()
         for i, deform, tweak, next_tweak, org in zip(count(0), self.bones.deform, tweaks, tweaks[1:], self.bones.org):
             handle_start = tweak if self.bbone_handles == 'TANGENT' else None
             handle_end = next_tweak if self.bbone_handles == 'TANGENT' else None
@@ -769,7 +884,7 @@ class HandleBendyRig(BendyRig):
             else:
                 ease_in = 0.0 if i == 0 and not self.bbone_easein else 1.0
                 ease_out = 0.0 if i == len(self.bones.deform) - 1 and not self.bbone_easeout else 1.0
-                self.setup_bbone(deform, self.bbone_segments, ease_in, ease_out, handle_start, handle_end)
+                self.setup_bbone(deform, segments[i], ease_in, ease_out, handle_start, handle_end)
             
 
     ####################################################
@@ -1235,6 +1350,7 @@ class ConnectingBendyRig(AttachedBendyRig):
             self.base = "TMP_PLACEHOLDER"
         self.base_connect = self.params.base_connect
         self.base_align = self.params.base_align
+        self.base_radius = self.params.base_radius
 
         self.base_parent = self.get_bone_parent(self.base_bone)
 
@@ -1253,6 +1369,23 @@ class ConnectingBendyRig(AttachedBendyRig):
         align_bone_y_axis(self.obj, bone_name, align)
         align_bone_roll(self.obj, bone_name, roll)
 
+    def nearest_parent_tweak(self, parent_tweaks):
+        '''
+        Find the parent tweak closest to the base bone, within the merge radius.
+        The KD-tree is built once and shared by all children of the parent
+        '''
+        parent = self.rigify_parent
+        cache = _tweak_kdtrees.get(parent)
+        if not cache or cache[0] != parent_tweaks:
+            cache = (list(parent_tweaks), bone_kdtree(self.obj, parent_tweaks))
+            _tweak_kdtrees[parent] = cache
+
+        base_bone = self.get_bone(self.base_bone)
+        co, index, dist = cache[1].find(base_bone.head)
+        if index is None or (self.base_radius and dist > self.base_radius * base_bone.length):
+            return None
+        return parent_tweaks[index]
+
     @stage.parent_bones
     def prepare_connection(self):
         '''Check if connecting parents exist and move tweaks'''
@@ -1268,21 +1401,17 @@ class ConnectingBendyRig(AttachedBendyRig):
             # Incoming tweak
             parent_tweaks = self.attribute_return(['rigify_parent', 'bones', 'ctrl', 'tweak'])
             if self.base_type == 'TWEAK' and parent_tweaks:
-                delta = self.distance(self.base_bone, parent_tweaks[0])
-                self.base = parent_tweaks[0]
-                for tweak in parent_tweaks:
-                    dist = self.distance(self.base_bone, tweak)
-                    if dist < delta:
-                        delta = dist
-                        self.base = tweak
-                bone_in = self.get_bone(self.base)
-
-                connect = bone_in.head
-                if self.base == parent_tweaks[0]:
-                    align = bone_in.head - bone_in.tail
-                elif self.base == parent_tweaks[-1]:
-                    align = bone_in.tail - bone_in.head
-                roll = self.base
+                # Stays unconnected if no tweak is within the merge radius
+                self.base = self.nearest_parent_tweak(parent_tweaks)
+                if self.base:
+                    bone_in = self.get_bone(self.base)
+
+                    connect = bone_in.head
+                    if self.base == parent_tweaks[0]:
+                        align = bone_in.head - bone_in.tail
+                    elif self.base == parent_tweaks[-1]:
+                        align = bone_in.tail - bone_in.head
+                    roll = self.base
             
             # Incoming parent
             elif self.base_type == 'PARENT' and self.base_parent:
@@ -1368,6 +1497,9 @@ class ConnectingBendyRig(AttachedBendyRig):
             r.prop(params, 'base_connect', toggle=True)
             r.prop(params, 'base_align', toggle=True)
             r.prop(params, 'base_scale_offset', text="", icon='CON_SIZELIKE')
+            if params.base_type == 'TWEAK':
+                r = layout.row(align=True)
+                r.prop(params, 'base_radius')
             if params.base_scale_offset:
                 r = layout.row()
                 r.prop(params, 'base_scale_x', text="X")
@@ -1403,4 +1535,11 @@ class ConnectingBendyRig(AttachedBendyRig):
             name="Align First",
             default=True,
             description="Align first tweak to its parent for a smooth curve"
+        )
+
+        params.base_radius = bpy.props.FloatProperty(
+            name="Merge Radius",
+            default=0.0,
+            min=0.0,
+            description="Only merge with parent tweaks within this distance, relative to the first bone length. 0 for any distance"
         )
\ No newline at end of file
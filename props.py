@@ -12,6 +12,50 @@ class BendifySceneSettings(bpy.types.PropertyGroup):
     alm_layers: bpy.props.BoolVectorProperty(name="Visible Armature Layers", size=32)
     alm_empty: bpy.props.BoolProperty(name="Show Empty Armature Layers", default=False)
     alm_compact: bpy.props.BoolProperty(name="Reduce Displayed Properties", default=False)
+    alm_stats: bpy.props.BoolProperty(
+        name="Show Layer Statistics",
+        default=False,
+        description="Show bone, deform bone, constraint, driver and B-Bone segment counts per layer"
+    )
+    profile_generation: bpy.props.BoolProperty(
+        name="Profile Generation",
+        default=False,
+        description="Time every stage of every Bendify rig during generation and export a Chrome trace"
+    )
+    profile_path: bpy.props.StringProperty(
+        name="Profile File",
+        default="//bendify_profile.json",
+        subtype='FILE_PATH',
+        description="Chrome trace JSON output; a summary table is written next to it as .txt"
+    )
+    fingerprint_generation: bpy.props.BoolProperty(
+        name="Report Changed Samples",
+        default=False,
+        description="Fingerprint every metarig sample during generation and report the ones changed since the last generation"
+    )
+    cost_generation: bpy.props.BoolProperty(
+        name="Analyze Rig Cost",
+        default=False,
+        description="Estimate the evaluation cost of every sample during generation and store it on the metarig"
+    )
+    cost_rows: bpy.props.IntProperty(
+        name="Most Expensive Samples",
+        default=5,
+        min=0,
+        description="Number of samples listed by evaluation cost"
+    )
+    widgets_lod: bpy.props.BoolProperty(
+        name="Simplify Widgets on Playback",
+        default=False,
+        description="Swap custom shapes to simplified variants while the animation plays"
+    )
+    widgets_lod_cells: bpy.props.IntProperty(
+        name="Resolution",
+        default=4,
+        min=1,
+        max=32,
+        description="Grid cells per widget size used to merge vertices of simplified widgets"
+    )
     alm_mode: bpy.props.EnumProperty(
         name="Armature Layer Manager Mode",
         default='BUTTONS',
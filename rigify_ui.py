@@ -1,6 +1,8 @@
 import bpy
 from rigify.ui import DATA_PT_rigify_buttons, DATA_PT_rigify_bone_groups, BONE_PT_rigify_buttons
 
+from .utils.cost import costs_get
+
 class BENDIFY_PT_BoneType(bpy.types.Panel):
     bl_category = "Bendify"
     bl_space_type = 'VIEW_3D'
@@ -54,3 +56,28 @@ class BENDIFY_PT_RigifyButtons(bpy.types.Panel):
     
     def draw(self, context):
         DATA_PT_rigify_buttons.draw(self, context)
+
+        bendify = context.scene.bendify
+        row = self.layout.row(align=True)
+        row.prop(bendify, 'profile_generation', text="Profile", toggle=True, icon='TIME')
+        sub = row.row(align=True)
+        sub.active = bendify.profile_generation
+        sub.prop(bendify, 'profile_path', text="")
+        row = self.layout.row(align=True)
+        row.prop(bendify, 'cost_generation', text="Analyze Cost", toggle=True, icon='SORTTIME')
+        row.prop(bendify, 'fingerprint_generation', text="Report Changes", toggle=True, icon='FILE_REFRESH')
+
+        costs = costs_get(context.active_object)
+        if costs:
+            box = self.layout.box()
+            row = box.row()
+            row.label(text="Cost: {:.1f}".format(sum(e["cost"] for e in costs)), icon='SORTTIME')
+            row.label(text="{} Samples".format(len(costs)))
+            row.operator('armature.bendify_rig_cost_export', text="", icon='EXPORT')
+            col = box.column(align=True)
+            for entry in costs[:bendify.cost_rows]:
+                row = col.row()
+                row.label(text=entry["sample"])
+                row.label(text=entry["type"])
+                row.label(text="{:.1f}".format(entry["cost"]))
+            box.prop(bendify, 'cost_rows')
@@ -24,6 +24,7 @@ from rigify.base_rig import BaseRig, stage
 from rigify.base_generate import SubstitutionRig
 from rigify.utils.naming import strip_org
 
+from ...utils.plugins import register_rig_plugins
 from ...utils.widgets_bendy import create_properties_widget
 
 class Rig(SubstitutionRig):
@@ -47,6 +48,8 @@ class PropertyRig(BaseRig):
         self.panel_selected_only = self.params.panel_selected_only
         self.properties_widget_text = self.params.properties_widget_text
 
+        register_rig_plugins(self)
+
         #self.rigify_parent
 
     ####################################################
@@ -27,7 +27,9 @@ from rigify.utils.naming import make_derived_name, strip_org
 from rigify.base_rig import stage
 from rigify.rigs.limbs.limb_rigs import BaseLimbRig
 
-from ...utils.bones import align_bone
+from ...utils.bones import align_bone, bbone_handle_inherit
+from ...utils.plugins import register_rig_plugins
+from ...utils.mechanism import lod_rig, make_lod_segments_driver, make_lod_stretch_drivers
 
 from itertools import count
 
@@ -84,20 +86,37 @@ class BaseLimbBendyRig(BaseLimbRig):
         self.ease_in = self.params.ease_in
         self.ease_joints = self.params.ease_joints
         self.ease_out = self.params.ease_out
+        self.bbone_handle_native = self.params.bbone_handle_native
+        self.bbones_lod = self.params.bbones_lod
         self.volume_deform_default = self.params.limb_volume_deform_default
         self.volume_deform_panel = self.params.limb_volume_deform_panel
         self.keep_axis = 'SWING_Y'
+        self.segment_index = None
+
+        register_rig_plugins(self)
 
     ##############################
     # Utilities
 
     def check_entry_targets(self, entry):
         '''Return ORG triple (previous, current & next) based on entry '''
-        p = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx - 1 ][0].org)
-        c = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx][0].org)
-        n = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx + 1 ][0].org)
+        p = self.get_segment_entry(entry.org_idx - 1).org
+        c = self.get_segment_entry(entry.org_idx).org
+        n = self.get_segment_entry(entry.org_idx + 1).org
         return p, c, n
 
+    def get_segment_entry(self, org_idx):
+        '''Return the first full segment table entry of an ORG, index is built on first use'''
+        if self.segment_index is None:
+            self.segment_index = {}
+            for entry in self.segment_table_full:
+                self.segment_index.setdefault(entry.org_idx, entry)
+        return self.segment_index[org_idx]
+
+    def bbone_handle_inherit(self, bone, handle, end=False, scale=False, ease=False):
+        '''Use native B-Bone handle inheritance instead of drivers, if enabled and identical'''
+        return self.bbone_handle_native and bbone_handle_inherit(self.obj, bone, handle, end, scale, ease)
+
     ####################################################
     # Master control
 
@@ -143,6 +162,14 @@ class BaseLimbBendyRig(BaseLimbRig):
                 slider=True
             )
 
+    @stage.rig_bones
+    def drivers_lod_deform_chain(self):
+        if self.bbones_lod:
+            lod_bone = lod_rig(self, self.bones.ctrl.flatten())
+            for deform in self.bones.deform:
+                make_lod_segments_driver(self, lod_bone, deform, self.bbones_lod)
+                make_lod_stretch_drivers(self, lod_bone, deform)
+
     @stage.configure_bones
     def configure_master_control(self):
         '''Unlocked master control scale'''
@@ -231,8 +258,8 @@ class BaseLimbBendyRig(BaseLimbRig):
     def rig_tweak_mch_bone(self, i, tweak, entry):
         '''Removed mechanics, only copy scale'''
         if not i == 0 and entry.seg_idx == 0:
-            prev_org = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx - 1 ][0].org)
-            next_org = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx + 1 ][0].org)
+            prev_org = self.get_segment_entry(entry.org_idx - 1).org
+            next_org = self.get_segment_entry(entry.org_idx + 1).org
             self.make_constraint(tweak, 'COPY_LOCATION', prev_org)
             align = self.make_constraint(tweak, 'STRETCH_TO', next_org, bulge=0, volume='NO_VOLUME', keep_axis=self.keep_axis)
             self.make_driver(align, 'influence', variables=[(self.prop_bone, 'align_joint_tweaks')])
@@ -312,133 +339,139 @@ class BaseLimbBendyRig(BaseLimbRig):
         pbone = self.get_bone(deform)
         space = 'LOCAL_SPACE'
         v_type = 'TRANSFORMS'
-        next_org = ([ s for s in self.segment_table_full if s.org_idx == entry.org_idx + 1 ][0].org)
+        next_org = self.get_segment_entry(entry.org_idx + 1).org
 
         if entry.seg_idx is not None:
             ####################################################
             # Easing
 
-            self.make_driver(
-                pbone,
-                'bbone_easein',
-                expression='scale_y - 1',
-                variables={
-                    'scale_y': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': tweak,
-                                'transform_type': 'SCALE_Y',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, tweak, ease=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_easein',
+                    expression='scale_y - 1',
+                    variables={
+                        'scale_y': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': tweak,
+                                    'transform_type': 'SCALE_Y',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
-            self.make_driver(
-                pbone,
-                'bbone_easeout',
-                expression='scale_y - 1',
-                variables={
-                    'scale_y': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': next_tweak,
-                                'transform_type': 'SCALE_Y',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, next_tweak, end=True, ease=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_easeout',
+                    expression='scale_y - 1',
+                    variables={
+                        'scale_y': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': next_tweak,
+                                    'transform_type': 'SCALE_Y',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
             ####################################################
             # Scale X
 
-            self.make_driver(
-                pbone,
-                'bbone_scaleinx',
-                variables={
-                    'scale_x': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': tweak,
-                                'transform_type': 'SCALE_X',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, tweak, scale=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_scaleinx',
+                    variables={
+                        'scale_x': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': tweak,
+                                    'transform_type': 'SCALE_X',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
-            self.make_driver(
-                pbone,
-                'bbone_scaleoutx',
-                variables={
-                    'scale_x': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': next_tweak,
-                                'transform_type': 'SCALE_X',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, next_tweak, end=True, scale=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_scaleoutx',
+                    variables={
+                        'scale_x': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': next_tweak,
+                                    'transform_type': 'SCALE_X',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
             ####################################################
             # Scale Z
 
-            self.make_driver(
-                pbone,
-                'bbone_scaleiny',
-                variables={
-                    'scale_z': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': tweak,
-                                'transform_type': 'SCALE_Z',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, tweak, scale=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_scaleiny',
+                    variables={
+                        'scale_z': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': tweak,
+                                    'transform_type': 'SCALE_Z',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
-            self.make_driver(
-                pbone,
-                'bbone_scaleouty',
-                variables={
-                    'scale_z': {
-                        'type': v_type,
-                        'targets':
-                        [
-                            {
-                                'id': self.obj,
-                                'bone_target': next_tweak,
-                                'transform_type': 'SCALE_Z',
-                                'transform_space': space,
-                            }
-                        ]
+            if not self.bbone_handle_inherit(deform, next_tweak, end=True, scale=True):
+                self.make_driver(
+                    pbone,
+                    'bbone_scaleouty',
+                    variables={
+                        'scale_z': {
+                            'type': v_type,
+                            'targets':
+                            [
+                                {
+                                    'id': self.obj,
+                                    'bone_target': next_tweak,
+                                    'transform_type': 'SCALE_Z',
+                                    'transform_space': space,
+                                }
+                            ]
+                        }
                     }
-                }
-            )
+                )
 
             ####################################################
             # Roll
@@ -568,6 +601,8 @@ class BaseLimbBendyRig(BaseLimbRig):
         r.prop(params, "ease_in", toggle=True)
         r.prop(params, "ease_joints", toggle=True)
         r.prop(params, "ease_out", toggle=True)
+        r.prop(params, "bbone_handle_native", text="", icon='HANDLE_ALIGNED')
+        layout.row().prop(params, "bbones_lod")
 
     def rotation_modes(self, layout, params):
         layout.row().prop(params, "rotation_mode_ik", text="IK")
@@ -645,6 +680,20 @@ class BaseLimbBendyRig(BaseLimbRig):
             description='Make outgoing joint bendy by default. Sets default ease for joint tweak to 1.'
         )
 
+        params.bbone_handle_native = bpy.props.BoolProperty(
+            name="Native Handle Scaling",
+            default=False,
+            description="Inherit B-Bone ease and scale from the tweak handles without drivers where the deformation is identical"
+        )
+
+        params.bbones_lod = bpy.props.IntProperty(
+            name="LOD B-Bone Segments",
+            default=0,
+            min=0,
+            max=32,
+            description="B-Bone segments of deform bones while the rig-wide Playback LOD switch is on. 0 to disable"
+        )
+
         params.limb_volume_deform_default = bpy.props.FloatProperty(
             name="Deform Volume Variation Default",
             default=1.0,
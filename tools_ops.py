@@ -1,7 +1,11 @@
 import bpy
+import json
 import re
 import unicodedata
 
+from bpy_extras.io_utils import ExportHelper
+
+from .utils.cost import costs_get, costs_write_csv
 from .utils.misc import attribute_return
 
 class BENDIFY_OT_RigifyCopyToSelected(bpy.types.Operator):
@@ -28,6 +32,24 @@ class BENDIFY_OT_RigifyCopyToSelected(bpy.types.Operator):
                         setattr(pb.rigify_parameters, k, getattr(act.rigify_parameters, k))
         return {"FINISHED"}
 
+class BENDIFY_OT_RigCostExport(bpy.types.Operator, ExportHelper):
+    """Export the evaluation cost of every sample of the last generation as CSV"""
+    bl_idname = 'armature.bendify_rig_cost_export'
+    bl_label = "Export Rig Cost"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".csv"
+    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return bool(costs_get(context.active_object))
+
+    def execute(self, context):
+        costs_write_csv(costs_get(context.active_object), self.filepath)
+        self.report({'INFO'}, "Rig cost written to " + self.filepath)
+        return {"FINISHED"}
+
 class BENDIFY_OT_ReparentObjectsToBones(bpy.types.Operator):
     """Fix parenting offset for Objects parented to Bones"""
     bl_idname = 'object.reparent_objects_to_bones'
@@ -155,6 +177,129 @@ class BENDIFY_OT_ForceDriversUpdate(bpy.types.Operator):
         return {"FINISHED"}
 
 
+BAKED_DRIVERS_PROP = "bendify_baked_drivers"
+BAKED_DRIVERS_TRACK = "Bendify Baked Drivers"
+
+class BendyDriversMixIn():
+    """Shared driver lookup for baking and restoring B-Bone drivers"""
+    pattern = re.compile(r'pose\.bones\[".+?"\]\.bbone_(ease|scale|roll)(in|out)')
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj and obj.type == 'ARMATURE' and attribute_return(obj, ['animation_data', 'drivers'])
+
+    def bendy_drivers(self, obj):
+        return [d for d in obj.animation_data.drivers if self.pattern.match(d.data_path)]
+
+    def baked_track(self, obj):
+        return obj.animation_data.nla_tracks.get(BAKED_DRIVERS_TRACK)
+
+class BENDIFY_OT_BendyDriversBake(bpy.types.Operator, BendyDriversMixIn):
+    """Bake B-Bone ease, scale and roll drivers of the active armature to keyframes on their own NLA track and mute them"""
+    bl_idname = 'object.bendy_drivers_bake'
+    bl_label = "Bake Bendy Drivers"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    frame_start: bpy.props.IntProperty(name="Start Frame", default=1)
+    frame_end: bpy.props.IntProperty(name="End Frame", default=250)
+    frame_step: bpy.props.IntProperty(name="Frame Step", default=1, min=1)
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        scene = context.scene
+        obj = context.active_object
+        if self.frame_end < self.frame_start:
+            self.report({'ERROR'}, "End frame is before start frame.")
+            return {"CANCELLED"}
+        drivers = [d for d in self.bendy_drivers(obj) if not d.mute]
+        if not drivers:
+            self.report({'INFO'}, "No active bendy drivers found.")
+            return {"CANCELLED"}
+
+        # Evaluate all drivers once per frame and collect flat (frame, value) pairs
+        frames = range(self.frame_start, self.frame_end + 1, self.frame_step)
+        values = {d: [] for d in drivers}
+        frame_current = scene.frame_current
+        for frame in frames:
+            scene.frame_set(frame)
+            obj_eval = obj.evaluated_get(context.evaluated_depsgraph_get())
+            for d, co in values.items():
+                value = obj_eval.path_resolve(d.data_path)
+                co.extend((frame, value[d.array_index] if d.array_index >= 0 and hasattr(value, '__len__') else value))
+        scene.frame_set(frame_current)
+
+        # Keys go to a dedicated action on its own NLA track, the animator's action stays untouched
+        anim = obj.animation_data
+        track = self.baked_track(obj)
+        action = None
+        if track:
+            for strip in list(track.strips):
+                action = action or strip.action
+                track.strips.remove(strip)
+        else:
+            track = anim.nla_tracks.new()
+            track.name = BAKED_DRIVERS_TRACK
+        if not action:
+            action = bpy.data.actions.new(obj.name + "_bendy_baked")
+
+        baked = json.loads(obj.get(BAKED_DRIVERS_PROP, "[]"))
+        for d, co in values.items():
+            fc = action.fcurves.find(d.data_path, index=d.array_index)
+            if fc:
+                action.fcurves.remove(fc)
+            group = d.data_path.split('"')[1]
+            fc = action.fcurves.new(d.data_path, index=d.array_index, action_group=group)
+            fc.keyframe_points.add(len(frames))
+            fc.keyframe_points.foreach_set('co', co)
+            fc.keyframe_points.foreach_set('interpolation', [1] * len(frames))
+            fc.update()
+            d.mute = True
+            baked.append([d.data_path, d.array_index])
+        obj[BAKED_DRIVERS_PROP] = json.dumps(baked)
+        strip = track.strips.new(action.name, int(action.frame_range[0]), action)
+        strip.blend_type = 'REPLACE'
+        strip.extrapolation = 'HOLD'
+
+        self.report({'INFO'}, "{} drivers baked over {} frames.".format(len(drivers), len(frames)))
+        return {"FINISHED"}
+
+class BENDIFY_OT_BendyDriversRestore(bpy.types.Operator, BendyDriversMixIn):
+    """Unmute baked B-Bone drivers of the active armature and remove their baked NLA track"""
+    bl_idname = 'object.bendy_drivers_restore'
+    bl_label = "Restore Bendy Drivers"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    remove_keys: bpy.props.BoolProperty(name="Remove Baked Keyframes", default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return super().poll(context) and BAKED_DRIVERS_PROP in context.active_object
+
+    def execute(self, context):
+        obj = context.active_object
+        baked = json.loads(obj[BAKED_DRIVERS_PROP])
+        for data_path, index in baked:
+            d = obj.animation_data.drivers.find(data_path, index=index)
+            if d:
+                d.mute = False
+        track = self.baked_track(obj)
+        if track and self.remove_keys:
+            actions = {strip.action for strip in track.strips if strip.action}
+            obj.animation_data.nla_tracks.remove(track)
+            for action in actions:
+                if not action.users:
+                    bpy.data.actions.remove(action)
+        del obj[BAKED_DRIVERS_PROP]
+
+        self.report({'INFO'}, "{} drivers restored.".format(len(baked)))
+        return {"FINISHED"}
+
+
 class BENDIFY_OT_StretchToReset(bpy.types.Operator):
     """Reset Stretch To constraint length for bones"""
     bl_idname = 'pose.stretchto_reset'
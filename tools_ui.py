@@ -35,6 +35,9 @@ class BendifyToolsObjectPanel():
 
         col.row().operator('object.reparent_objects_to_bones', icon='BONE_DATA')
         col.row().operator('object.force_drivers_update', icon='DRIVER')
+        row = col.row(align=True)
+        row.operator('object.bendy_drivers_bake', icon='REC')
+        row.operator('object.bendy_drivers_restore', text="", icon='LOOP_BACK')
         col.row().operator('object.object_names_normalize', icon='FILE_TEXT')
         col.row().operator('view3d.material_slots_switch', icon='MATERIAL')
 
@@ -20,6 +20,7 @@
 
 import bpy
 
+from mathutils.kdtree import KDTree
 from rigify.utils.bones import align_bone_roll, align_bone_x_axis, \
 align_bone_y_axis, align_bone_z_axis, get_bone
 
@@ -32,6 +33,37 @@ def real_bone(obj, bone_name):
     bones = obj.data.edit_bones if obj.mode == 'EDIT' else obj.pose.bones
     return bone_name and bone_name in bones
 
+def bbone_handle_inherit(obj, bone_name, handle_name, end=False, scale=False, ease=False):
+    '''
+    Let a B-Bone inherit X/Z scale and/or ease from its custom handle without drivers.
+    Returns False and changes nothing if the result would differ from the driver setup
+    '''
+    bone = obj.data.bones[bone_name]
+    side = 'end' if end else 'start'
+
+    # Not available in this Blender version
+    if not hasattr(bone, 'bbone_handle_use_scale_' + side):
+        return False
+
+    # Handle has to be the custom handle of this side
+    handle = getattr(bone, 'bbone_custom_handle_' + side)
+    if getattr(bone, 'bbone_handle_type_' + side) == 'AUTO' or not handle or not handle.name == handle_name:
+        return False
+
+    # Native inheritance reads the handle's own channels, ignoring constraints
+    if obj.pose.bones[handle_name].constraints:
+        return False
+
+    # Ease is multiplied instead of offset, only identical for a rest ease of 1
+    if ease and not getattr(bone, 'bbone_easeout' if end else 'bbone_easein') == 1.0:
+        return False
+
+    if scale:
+        setattr(bone, 'bbone_handle_use_scale_' + side, (True, False, True))
+    if ease:
+        setattr(bone, 'bbone_handle_use_ease_' + side, True)
+    return True
+
 #=============================================
 # Math
 #=============================================
@@ -47,6 +79,54 @@ def distance(obj, bone_name1, bone_name2, tail=False):
 
     return (pos1 - pos2).length
 
+def bone_kdtree(obj, bone_names, tail=False):
+    '''
+    Return a balanced KD-tree of bone heads (or tails), indexed like bone_names
+    '''
+    kd = KDTree(len(bone_names))
+    for i, name in enumerate(bone_names):
+        bone = get_bone(obj, name)
+        kd.insert(bone.tail if tail else bone.head, i)
+    kd.balance()
+    return kd
+
+def deform_vertex_counts(obj):
+    '''
+    Return the number of weighted vertices per vertex group in all meshes deformed by obj
+    '''
+    counts = {}
+    for ob in bpy.data.objects:
+        if ob.type != 'MESH' or not any(
+            m.type == 'ARMATURE' and m.object == obj for m in ob.modifiers
+        ):
+            continue
+        names = {vg.index: vg.name for vg in ob.vertex_groups}
+        for v in ob.data.vertices:
+            for g in v.groups:
+                if g.weight > 0.0 and g.group in names:
+                    counts[names[g.group]] = counts.get(names[g.group], 0) + 1
+    return counts
+
+def adaptive_segments(weights, segments, minimum=1, maximum=32, budget=0):
+    '''
+    Distribute B-Bone segments by relative weight: the average weight gets the
+    given segments, clamped to min/max and reduced to fit a total budget
+    '''
+    mean = sum(weights) / len(weights) if weights else 0.0
+    if not mean:
+        return [min(max(segments, minimum), maximum)] * len(weights)
+
+    result = [min(max(round(segments * w / mean), minimum), maximum) for w in weights]
+    if budget:
+        # Take segments from the bones with the most segments per weight first
+        while sum(result) > budget:
+            reducible = [i for i, s in enumerate(result) if s > minimum]
+            if not reducible:
+                break
+            i = max(reducible, key=lambda i: result[i] / (weights[i] or 1e-6))
+            result[i] -= 1
+    return result
+
 #=============================================
 # Aligning
 #=============================================
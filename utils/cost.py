@@ -0,0 +1,170 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import csv
+import json
+import re
+
+from rigify.base_generate import GeneratorPlugin
+
+from .misc import attribute_return
+
+
+COST_PROP = "bendify_costs"
+
+# Relative evaluation weights, a plain bone is 1
+COST_WEIGHTS = {
+    "bone": 1.0,
+    "segment": 0.25,
+    "driver": 2.0,
+    "constraint": 1.5,
+}
+
+CONSTRAINT_WEIGHTS = {
+    'ARMATURE': 3.0,
+    'STRETCH_TO': 2.0,
+    'DAMPED_TRACK': 1.5,
+    'IK': 8.0,
+    'SPLINE_IK': 8.0,
+    'COPY_TRANSFORMS': 1.5,
+    'COPY_LOCATION': 1.0,
+    'COPY_ROTATION': 1.0,
+    'COPY_SCALE': 1.0,
+    'LIMIT_DISTANCE': 1.0,
+}
+
+CSV_FIELDS = ("sample", "type", "bones", "deform", "segments", "constraints", "drivers", "cost")
+
+#=============================================
+# Cost
+#=============================================
+
+def cost_score(entry):
+    '''Weighted evaluation cost of a sample'''
+    score = entry["bones"] * COST_WEIGHTS["bone"]
+    score += entry["segments"] * COST_WEIGHTS["segment"]
+    score += entry["drivers"] * COST_WEIGHTS["driver"]
+    for con_type, amount in entry["constraint_types"].items():
+        score += amount * CONSTRAINT_WEIGHTS.get(con_type, COST_WEIGHTS["constraint"])
+    return round(score, 2)
+
+def costs_get(metarig):
+    '''Stored cost analysis of a metarig, sorted by cost'''
+    stored = attribute_return(metarig, ['data']) and metarig.data.get(COST_PROP)
+    return json.loads(stored) if stored else []
+
+def costs_write_csv(costs, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS + tuple("con_" + t.lower() for t in sorted(CONSTRAINT_WEIGHTS)))
+        for entry in costs:
+            writer.writerow(
+                [entry[k] for k in CSV_FIELDS]
+                + [entry["constraint_types"].get(t, 0) for t in sorted(CONSTRAINT_WEIGHTS)]
+            )
+
+#=============================================
+# Generator plugin
+#=============================================
+
+class RigCostAnalyzer(GeneratorPlugin):
+    """
+    Attributes every generated bone, constraint and driver to the sample that
+    created it and stores a weighted cost table on the metarig.
+    """
+
+    priority = -800
+
+    def __init__(self, generator):
+        super().__init__(generator)
+        self.rigs = []
+
+    def add_rig(self, rig):
+        self.rigs.append(rig)
+
+    def bone_owners(self):
+        '''Map bone names to their samples, using the generator owner table'''
+        owners = {}
+        for rig in self.rigs:
+            for name in rig.bones.flatten():
+                owners[name] = rig
+        for name, rig in getattr(self.generator, 'bone_owners', {}).items():
+            if rig in self.rigs:
+                owners[name] = rig
+        return owners
+
+    def analyze(self):
+        obj = self.obj
+        owners = self.bone_owners()
+        entries = {
+            rig: {
+                "sample": rig.base_bone,
+                "type": rig.__class__.__module__.split('.rigs.')[-1],
+                "bones": 0,
+                "deform": 0,
+                "segments": 0,
+                "constraints": 0,
+                "constraint_types": {},
+                "drivers": 0,
+            } for rig in self.rigs
+        }
+
+        for pb in obj.pose.bones:
+            entry = entries.get(owners.get(pb.name))
+            if not entry:
+                continue
+            entry["bones"] += 1
+            if pb.bone.use_deform:
+                entry["deform"] += 1
+                entry["segments"] += pb.bone.bbone_segments
+            for con in pb.constraints:
+                entry["constraints"] += 1
+                entry["constraint_types"][con.type] = entry["constraint_types"].get(con.type, 0) + 1
+
+        pattern = re.compile(r'pose\.bones\["(.+?)"\]')
+        for fcu in attribute_return(obj, ['animation_data', 'drivers'], True):
+            match = pattern.match(fcu.data_path)
+            entry = entries.get(owners.get(match.group(1))) if match else None
+            if entry:
+                entry["drivers"] += 1
+
+        for entry in entries.values():
+            entry["cost"] = cost_score(entry)
+        return sorted(entries.values(), key=lambda e: -e["cost"])
+
+    def finalize(self):
+        costs = self.analyze()
+        metarig = self.generator.metarig
+        metarig.data[COST_PROP] = json.dumps(costs)
+        print("Bendify: estimated evaluation cost {:.1f} for {} samples".format(
+            sum(e["cost"] for e in costs), len(costs)
+        ))
+
+
+def cost_enabled(context=None):
+    '''Check the scene settings for cost analysis'''
+    scene = (context or bpy.context).scene
+    return bool(attribute_return(scene, ['bendify', 'cost_generation']))
+
+def analyze_rig(rig):
+    '''Register a rig instance with the cost analyzer, if cost analysis is enabled'''
+    if cost_enabled():
+        RigCostAnalyzer(rig.generator).add_rig(rig)
@@ -0,0 +1,143 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import hashlib
+import inspect
+import json
+
+from rigify.base_generate import GeneratorPlugin
+
+from .misc import attribute_return
+
+
+FINGERPRINT_PROP = "bendify_fingerprints"
+
+_code_versions = {}
+
+#=============================================
+# Hashing
+#=============================================
+
+def round_vector(vector, digits=5):
+    return [round(v, digits) for v in vector]
+
+def code_version(cls):
+    '''Hash of the source files of all classes the rig type is built from'''
+    if cls not in _code_versions:
+        h = hashlib.sha1()
+        for c in cls.__mro__:
+            try:
+                path = inspect.getsourcefile(c)
+            except TypeError:
+                continue
+            if path:
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+        _code_versions[cls] = h.hexdigest()
+    return _code_versions[cls]
+
+def params_data(params):
+    '''Plain values of all rigify parameters of a sample'''
+    data = {}
+    for prop in params.bl_rna.properties:
+        key = prop.identifier
+        if key == 'rna_type':
+            continue
+        value = getattr(params, key, None)
+        if hasattr(value, '__len__') and not isinstance(value, str):
+            value = list(value)
+        data[key] = value
+    return data
+
+def bone_data(obj, name):
+    '''Rest geometry and parent chain of a bone'''
+    bone = obj.data.bones[name]
+    parents = []
+    parent = bone.parent
+    while parent:
+        parents.append(parent.name)
+        parent = parent.parent
+    return {
+        "head": round_vector(bone.head_local),
+        "tail": round_vector(bone.tail_local),
+        "matrix": [round_vector(row) for row in bone.matrix_local],
+        "connect": bone.use_connect,
+        "parents": parents,
+    }
+
+def sample_fingerprint(rig):
+    '''Fingerprint of a metarig sample: ORG geometry, parameters, parent chain and rig code'''
+    data = {
+        "type": rig.__class__.__module__,
+        "code": code_version(rig.__class__),
+        "params": params_data(rig.params),
+        "bones": [bone_data(rig.obj, name) for name in rig.bones.flatten('org')],
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+#=============================================
+# Generator plugin
+#=============================================
+
+class SampleChangeReport(GeneratorPlugin):
+    """
+    Reports the samples changed since the previous generation, by comparing the
+    fingerprint of every sample against the ones stored on the generated rig.
+    Only a report: all samples are still generated from scratch.
+    """
+
+    priority = -900
+
+    def __init__(self, generator):
+        super().__init__(generator)
+        self.fingerprints = {}
+        stored = self.obj.get(FINGERPRINT_PROP)
+        self.previous = json.loads(stored) if stored else {}
+
+    def add_rig(self, rig):
+        self.fingerprints[rig.base_bone] = sample_fingerprint(rig)
+
+    def changed_samples(self):
+        return sorted(
+            name for name, fingerprint in self.fingerprints.items()
+            if self.previous.get(name) != fingerprint
+        )
+
+    def finalize(self):
+        changed = self.changed_samples()
+        removed = sorted(set(self.previous) - set(self.fingerprints))
+        print("Bendify: {} of {} samples changed{}".format(
+            len(changed), len(self.fingerprints), ": " + ", ".join(changed) if changed else ""
+        ))
+        if removed:
+            print("Bendify: removed samples: " + ", ".join(removed))
+        self.obj[FINGERPRINT_PROP] = json.dumps(self.fingerprints, sort_keys=True)
+
+
+def fingerprint_enabled(context=None):
+    '''Check the scene settings for sample change reports'''
+    scene = (context or bpy.context).scene
+    return bool(attribute_return(scene, ['bendify', 'fingerprint_generation']))
+
+def report_rig_changes(rig):
+    '''Register a rig instance with the sample change report, if enabled'''
+    if fingerprint_enabled():
+        SampleChangeReport(rig.generator).add_rig(rig)
@@ -0,0 +1,276 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import numpy as np
+import re
+
+from bpy.app.handlers import persistent
+
+
+LAYER_BITS = 1 << np.arange(32, dtype=np.int64)
+DRIVER_BONE = re.compile(r'bones\["((?:[^"\\]|\\.)*)"\]')
+
+#=============================================
+# Layer occupancy
+#=============================================
+
+def bone_layers(bones):
+    '''Bone x layer boolean array of bones or edit bones'''
+    layers = np.empty(len(bones) * 32, dtype=bool)
+    bones.foreach_get('layers', layers)
+    return layers.reshape(-1, 32)
+
+def bone_flags(bones, attribute):
+    '''Boolean array of a bone attribute'''
+    flags = np.empty(len(bones), dtype=bool)
+    bones.foreach_get(attribute, flags)
+    return flags
+
+def layers_mask(layers):
+    '''Combined bitmask of a bone x layer array'''
+    return int(np.bitwise_or.reduce(layers @ LAYER_BITS)) if len(layers) else 0
+
+
+class LayerData():
+    """
+    Per-layer occupancy of an armature's bones, read in bulk: bone layer bitmasks,
+    bone and lock counts per layer and the layers of selected bones. Bones hidden
+    or only on layers outside the visible bitmask do not count as selected.
+    """
+
+    def __init__(self, bones, visible):
+        layers = bone_layers(bones)
+        locked = bone_flags(bones, 'hide_select')
+        self.masks = layers @ LAYER_BITS
+        self.used = layers_mask(layers)
+        self.visible = visible
+        shown = ~bone_flags(bones, 'hide') & (self.masks & visible != 0)
+        self.selected = layers_mask(layers[bone_flags(bones, 'select') & shown])
+        self.counts = layers.sum(axis=0).tolist()
+        self.locked = layers[locked].sum(axis=0).tolist()
+
+    def bone_mask(self, bones, name):
+        '''Layer bitmask of a bone by name, 0 if it is not in bones'''
+        index = bones.find(name) if name else -1
+        return int(self.masks[index]) if 0 <= index < len(self.masks) else 0
+
+
+def bone_driver_counts(obj, bones):
+    '''Number of drivers on each bone's pose and armature data properties'''
+    counts = np.zeros(len(bones), dtype=np.int64)
+    for id_data in (obj, obj.data):
+        anim = id_data.animation_data
+        if not anim:
+            continue
+        for fcurve in anim.drivers:
+            match = DRIVER_BONE.search(fcurve.data_path)
+            if match:
+                index = bones.find(match.group(1).replace('\\"', '"').replace('\\\\', '\\'))
+                if index >= 0:
+                    counts[index] += 1
+    return counts
+
+
+class LayerStats():
+    """
+    Per-layer totals of an armature object's bones: bones, deform bones,
+    constraints, drivers and B-Bone segments. Bones in several layers count in each.
+    Read from bones, so edit mode changes only show after leaving edit mode.
+    """
+
+    fields = ("Bones", "Def", "Con", "Drv", "Seg")
+
+    def __init__(self, obj):
+        bones = obj.data.bones
+        segments = np.empty(len(bones), dtype=np.int32)
+        bones.foreach_get('bbone_segments', segments)
+        constraints = np.zeros(len(bones), dtype=np.int64)
+        for pb in obj.pose.bones:
+            if len(pb.constraints):
+                constraints[bones.find(pb.name)] = len(pb.constraints)
+
+        values = np.column_stack((
+            np.ones(len(bones), dtype=np.int64),
+            bone_flags(bones, 'use_deform'),
+            constraints,
+            bone_driver_counts(obj, bones),
+            segments,
+        )).astype(np.int64)
+        self.layers = (bone_layers(bones).T.astype(np.int64) @ values).tolist()
+        self.totals = values.sum(axis=0).tolist()
+
+
+class RigifyLayout():
+    """
+    UI layout of a metarig's rigify layers: rows of (layer, name, group) for
+    every named layer in rows 0 to 27, and the name of the bottom layer.
+    """
+
+    def __init__(self, arma):
+        rigify_layers = arma.rigify_layers
+        rows = {}
+        for i in range(28):
+            layer = rigify_layers[i]
+            if 0 <= layer.row < 28 and layer.name.replace(" ", ""):
+                rows.setdefault(layer.row, []).append((i, layer.name, layer.group))
+        self.rows = [rows[r] for r in sorted(rows)]
+        self.bottom = rigify_layers[28].name
+
+
+class LayerCache():
+    """
+    LayerData per armature and bone collection and RigifyLayout per metarig,
+    rebuilt after the armature changed.
+    """
+
+    def __init__(self):
+        self.data = {}  # (armature pointer, edit mode) -> LayerData
+        self.layouts = {}  # armature pointer -> RigifyLayout
+        self.stats = {}  # object pointer -> (driver counts, LayerStats)
+
+    def get(self, arma, edit=False):
+        key = (arma.as_pointer(), edit)
+        visible = sum(1 << i for i, shown in enumerate(arma.layers) if shown)
+        data = self.data.get(key)
+        if not data or data.visible != visible:
+            data = self.data[key] = LayerData(arma.edit_bones if edit else arma.bones, visible)
+        return data
+
+    def layout(self, arma):
+        key = arma.as_pointer()
+        if key not in self.layouts:
+            self.layouts[key] = RigifyLayout(arma)
+        return self.layouts[key]
+
+    def statistics(self, obj):
+        '''LayerStats of an object, also rebuilt when its driver count changed'''
+        key = obj.as_pointer()
+        drivers = tuple(
+            len(id_data.animation_data.drivers) if id_data.animation_data else 0
+            for id_data in (obj, obj.data)
+        )
+        if key not in self.stats or self.stats[key][0] != drivers:
+            self.stats[key] = (drivers, LayerStats(obj))
+        return self.stats[key][1]
+
+    def tag_object(self, obj):
+        self.stats.pop(obj.as_pointer(), None)
+
+    def tag(self, arma):
+        pointer = arma.as_pointer()
+        for key in [k for k in self.data if k[0] == pointer]:
+            del self.data[key]
+        self.layouts.pop(pointer, None)
+
+    def clear(self):
+        self.data.clear()
+        self.layouts.clear()
+        self.stats.clear()
+
+
+layer_cache = LayerCache()
+
+#=============================================
+# Armature resolution
+#=============================================
+
+def is_metarig(obj):
+    '''Check if obj is a metarig with rigify layers'''
+    return hasattr(obj.data, 'rigify_layers') and len(obj.data.rigify_layers) >= 29
+
+
+class ArmatureCache():
+    """
+    Armature and metarig objects per scene, and the armature/metarig pair
+    resolved for each pin and active object state. Cleared when objects,
+    collections or armatures change.
+    """
+
+    def __init__(self):
+        self.scenes = {}  # scene pointer -> (armatures, metarigs)
+        self.resolved = {}  # (scene, pins, active object) pointers -> (armature, metarig)
+
+    def objects(self, scene):
+        key = scene.as_pointer()
+        if key not in self.scenes:
+            armas = [obj for obj in scene.objects if obj.type == 'ARMATURE']
+            self.scenes[key] = (armas, [obj for obj in armas if is_metarig(obj)])
+        return self.scenes[key]
+
+    def resolve(self, context, resolver):
+        '''Cached result of resolver(context) for the current scene, pins and active object'''
+        scene = context.scene
+        key = tuple(
+            obj.as_pointer() if obj else 0
+            for obj in (scene, scene.bendify.alm_pin, scene.bendify.alm_meta, context.active_object)
+        )
+        if key not in self.resolved:
+            self.resolved[key] = resolver(context)
+        return self.resolved[key]
+
+    def clear(self):
+        self.scenes.clear()
+        self.resolved.clear()
+
+
+armature_cache = ArmatureCache()
+
+#=============================================
+# Handlers
+#=============================================
+
+@persistent
+def layer_cache_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Armature):
+            layer_cache.tag(update.id.original)
+            layer_cache.stats.clear()
+            armature_cache.clear()
+        elif isinstance(update.id, bpy.types.Object) and layer_cache.stats:
+            # Posing and playback only move bones, statistics stay valid
+            if update.is_updated_geometry or update.is_updated_shading or not update.is_updated_transform:
+                layer_cache.tag_object(update.id.original)
+        elif isinstance(update.id, (bpy.types.Scene, bpy.types.Collection)):
+            armature_cache.clear()
+
+@persistent
+def layer_cache_clear(*args):
+    layer_cache.clear()
+    armature_cache.clear()
+
+handlers = (
+    (bpy.app.handlers.depsgraph_update_post, layer_cache_depsgraph_update),
+    (bpy.app.handlers.undo_post, layer_cache_clear),
+    (bpy.app.handlers.redo_post, layer_cache_clear),
+    (bpy.app.handlers.load_post, layer_cache_clear),
+)
+
+def layer_cache_register():
+    for handler_list, handler in handlers:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+def layer_cache_unregister():
+    for handler_list, handler in handlers:
+        if handler in handler_list:
+            handler_list.remove(handler)
+    layer_cache.clear()
+    armature_cache.clear()
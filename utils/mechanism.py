@@ -20,6 +20,10 @@
 
 import bpy
 
+from rigify.base_generate import GeneratorPlugin
+
+LOD_PROP = "bendify_lod"
+
 #=============================================
 # Constraint creation utilities
 #=============================================
@@ -61,3 +65,89 @@ def make_armature_constraint(
     # Options
     for p, v in options.items():
         setattr(arma, p, v)
+
+#=============================================
+# Playback LOD
+#=============================================
+
+def rig_root_bone(rig):
+    '''Top-most bone above a rig's base bone, the root of the generated rig'''
+    bone = rig.obj.data.bones[rig.base_bone]
+    while bone.parent:
+        bone = bone.parent
+    return bone.name
+
+def make_lod_property(rig, bone_name, controls):
+    '''
+    Create the rig-wide playback LOD switch on the root bone and show it in the rig panel
+    '''
+    rig.make_property(
+        bone_name,
+        LOD_PROP,
+        default=0,
+        min=0,
+        max=1,
+        description="Reduce B-Bone segments and disable stretching of all bendy rigs for faster playback"
+    )
+    panel = rig.script.panel_with_selected_check(rig, controls)
+    panel.custom_prop(bone_name, LOD_PROP, text="Playback LOD", toggle=True)
+
+class PlaybackLod(GeneratorPlugin):
+    """
+    Creates the playback LOD switch once per generated rig on its root bone,
+    shown in one panel section for the controls of every rig that uses it.
+    """
+
+    def __init__(self, generator):
+        super().__init__(generator)
+        self.rigs = []
+        self.controls = []
+        self.bone = None
+
+    def add_rig(self, rig, controls):
+        if not self.bone:
+            self.bone = rig_root_bone(rig)
+        self.rigs.append(rig)
+        self.controls.extend(c for c in controls if c not in self.controls)
+
+    def rig_bones(self):
+        if self.rigs:
+            make_lod_property(self.rigs[0], self.bone, self.controls)
+
+
+def lod_rig(rig, controls):
+    '''
+    Register a rig using the playback LOD switch, with the controls that show it.
+    Returns the bone holding the switch
+    '''
+    plugin = PlaybackLod(rig.generator)
+    plugin.add_rig(rig, controls)
+    return plugin.bone
+
+def make_lod_segments_driver(rig, lod_bone, bone_name, segments):
+    '''
+    Drive B-Bone segments down to the LOD count while the LOD switch is on
+    '''
+    bone = rig.obj.data.bones[bone_name]
+    if segments >= bone.bbone_segments:
+        return
+    rig.make_driver(
+        bone,
+        'bbone_segments',
+        expression="{} if var else {}".format(segments, bone.bbone_segments),
+        variables=[(lod_bone, LOD_PROP)]
+    )
+
+def make_lod_stretch_drivers(rig, lod_bone, bone_name):
+    '''
+    Mute the stretch constraints of a bone, and with them their volume drivers,
+    while the LOD switch is on
+    '''
+    for con in rig.get_bone(bone_name).constraints:
+        if con.type == 'STRETCH_TO' and con.influence == 1.0:
+            rig.make_driver(
+                con,
+                'influence',
+                expression="0 if var else 1",
+                variables=[(lod_bone, LOD_PROP)]
+            )
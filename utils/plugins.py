@@ -0,0 +1,32 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+from .cost import analyze_rig
+from .fingerprint import report_rig_changes
+from .profiling import profile_rig
+from .widgets_bendy import share_rig_widgets
+
+
+def register_rig_plugins(rig):
+    '''Register a Bendify rig instance with the generator plugins, optional ones only if enabled'''
+    analyze_rig(rig)
+    report_rig_changes(rig)
+    profile_rig(rig)
+    share_rig_widgets(rig)
@@ -0,0 +1,182 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import json
+import os
+
+from functools import wraps
+from time import perf_counter
+
+from rigify.base_generate import GeneratorPlugin
+
+from .misc import attribute_return
+
+
+#=============================================
+# Counting
+#=============================================
+
+def count_bones(obj):
+    return len(obj.data.edit_bones) if obj.mode == 'EDIT' else len(obj.data.bones)
+
+def count_constraints(obj):
+    '''Pose constraints are only valid outside of edit mode'''
+    if obj.mode == 'EDIT':
+        return 0
+    return sum(len(pb.constraints) for pb in obj.pose.bones)
+
+def count_drivers(obj):
+    return len(attribute_return(obj, ['animation_data', 'drivers'], True))
+
+def profile_enabled(context=None):
+    '''Check the scene settings for generation profiling'''
+    scene = (context or bpy.context).scene
+    return bool(attribute_return(scene, ['bendify', 'profile_generation']))
+
+#=============================================
+# Generator plugin
+#=============================================
+
+class GenerationProfiler(GeneratorPlugin):
+    """
+    Times every stage method of every profiled rig and counts the bones,
+    constraints and drivers it creates. Exports a Chrome trace on finalize.
+    """
+
+    priority = -1000
+
+    def __init__(self, generator):
+        super().__init__(generator)
+        self.time_start = perf_counter()
+        self.rigs = []
+        self.records = []
+
+    def profile_rig(self, rig):
+        '''Replace the rig's stage methods with timed instance wrappers'''
+        if rig in self.rigs:
+            return
+        self.rigs.append(rig)
+
+        cls = rig.__class__
+        names = set(getattr(cls, 'rigify_stages', ()))
+        for methods in getattr(cls, 'rigify_stage_map', {}).values():
+            names.update(methods)
+        names.discard('initialize')
+
+        for name in names:
+            setattr(rig, name, self.wrap(rig, name, getattr(rig, name)))
+
+    def wrap(self, rig, name, method):
+        obj = self.obj
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            bones, constraints, drivers = count_bones(obj), count_constraints(obj), count_drivers(obj)
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            end = perf_counter()
+            self.records.append({
+                "rig": rig.base_bone,
+                "type": rig.__class__.__module__.split('.')[-1],
+                "tid": self.rigs.index(rig),
+                "method": name,
+                "stage": attribute_return(self.generator, ['stage']) or "",
+                "start": start - self.time_start,
+                "duration": end - start,
+                "bones": count_bones(obj) - bones,
+                "constraints": count_constraints(obj) - constraints,
+                "drivers": count_drivers(obj) - drivers,
+            })
+            return result
+
+        return timed
+
+    ####################################################
+    # Export
+
+    def trace(self):
+        '''Chrome trace event list, one thread per rig'''
+        events = [
+            {
+                "name": "thread_name",
+                "ph": 'M',
+                "pid": 0,
+                "tid": i,
+                "args": {"name": rig.base_bone},
+            } for i, rig in enumerate(self.rigs)
+        ]
+        for r in self.records:
+            events.append({
+                "name": r["method"],
+                "cat": r["stage"],
+                "ph": 'X',
+                "ts": r["start"] * 1e6,
+                "dur": r["duration"] * 1e6,
+                "pid": 0,
+                "tid": r["tid"],
+                "args": {k: r[k] for k in ("rig", "type", "bones", "constraints", "drivers")},
+            })
+        return events
+
+    def summary(self):
+        '''Table of all stage methods, summed over rigs and sorted by total time'''
+        totals = {}
+        for r in self.records:
+            key = (r["type"], r["method"])
+            t = totals.setdefault(key, [0, 0.0, 0, 0, 0])
+            t[0] += 1
+            t[1] += r["duration"]
+            t[2] += r["bones"]
+            t[3] += r["constraints"]
+            t[4] += r["drivers"]
+
+        lines = ["{:<24}{:<40}{:>6}{:>12}{:>8}{:>8}{:>8}".format(
+            "Rig Type", "Method", "Calls", "Total ms", "Bones", "Constr", "Drivers"
+        )]
+        for (rig_type, method), t in sorted(totals.items(), key=lambda i: -i[1][1]):
+            lines.append("{:<24}{:<40}{:>6}{:>12.2f}{:>8}{:>8}{:>8}".format(
+                rig_type, method, t[0], t[1] * 1000, t[2], t[3], t[4]
+            ))
+        lines.append("Total: {:.2f} ms in {} rigs".format(
+            sum(r["duration"] for r in self.records) * 1000, len(self.rigs)
+        ))
+        return "\n".join(lines)
+
+    def finalize(self):
+        path = attribute_return(bpy.context.scene, ['bendify', 'profile_path']) or "//bendify_profile.json"
+        path = bpy.path.abspath(path)
+        if not os.path.isabs(path):
+            path = os.path.join(bpy.app.tempdir, path)
+
+        summary = self.summary()
+        print(summary)
+
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": self.trace(), "displayTimeUnit": "ms"}, f)
+        with open(os.path.splitext(path)[0] + ".txt", 'w') as f:
+            f.write(summary)
+        print("Bendify profile written to " + path)
+
+
+def profile_rig(rig):
+    '''Register a rig instance with the generation profiler, if profiling is enabled'''
+    if profile_enabled():
+        GenerationProfiler(rig.generator).profile_rig(rig)
@@ -19,52 +19,295 @@
 # <pep8 compliant>
 
 import bpy
+import hashlib
+import numpy as np
 
 from math import pi
 
+from rigify.base_generate import GeneratorPlugin
 from rigify.utils.widgets import create_widget, obj_to_bone
 from rigify.rigs.widgets import create_gear_widget
 
 WGT_PREFIX = "WGT-"  # Prefix for widget objects
+WGT_HASH_PROP = "bendify_widget_hash"  # Geometry hash of shared widget meshes
+WGT_LOD_PROP = "bendify_widget_lod"  # Original widgets of bones swapped to LOD variants
+WGT_MESH_PROP = "bendify_widget_mesh"  # Original shared mesh of curve widgets converted from mesh
 
-def create_properties_widget(rig, bone_name, size=1.0, bone_transform_name=None, text=""):
+#=============================================
+# Widget mesh sharing
+#=============================================
+
+def widget_mesh_hash(mesh):
     """
-    Creates a property (gear) widget with additional text.
+    Hash of a widget mesh's vertex positions and topology.
     """
-    obj = create_gear_widget(rig, bone_name, size * 8.887729560524728, bone_transform_name)
+    co = [0.0] * (len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get('co', co)
+    edges = [0] * (len(mesh.edges) * 2)
+    mesh.edges.foreach_get('vertices', edges)
+    loops = [0] * len(mesh.loops)
+    mesh.loops.foreach_get('vertex_index', loops)
+    totals = [0] * len(mesh.polygons)
+    mesh.polygons.foreach_get('loop_total', totals)
 
-    if text and obj:
+    h = hashlib.sha1()
+    h.update(repr([round(c, 5) for c in co]).encode())
+    h.update(repr((edges, loops, totals)).encode())
+    return h.hexdigest()
+
+def share_widget_mesh(obj):
+    """
+    Replace a widget object's mesh with an identical registered mesh,
+    or register its mesh for sharing if it is the first of its shape.
+    """
+    if not obj or obj.type != 'MESH':
+        return
+    mesh = obj.data
+    key = widget_mesh_hash(mesh)
+    name = WGT_PREFIX + "MESH-" + key[:16]
+    shared = bpy.data.meshes.get(name)
+    if shared is mesh:
+        return
+    if shared and shared.get(WGT_HASH_PROP) == key:
+        obj.data = shared
+        if not mesh.users:
+            bpy.data.meshes.remove(mesh)
+    elif not mesh.get(WGT_HASH_PROP):
+        mesh.name = name
+        mesh[WGT_HASH_PROP] = key
+
+def unshare_widget_mesh(obj):
+    """
+    Give a widget its own mesh copy before editing it, so shared shapes stay intact.
+    """
+    if obj and obj.type == 'MESH' and obj.data.get(WGT_HASH_PROP):
+        if obj.data.users > 1:
+            obj.data = obj.data.copy()
+        # Free the hash name, so the shape can be shared again later
+        obj.data.name = obj.name
+        del obj.data[WGT_HASH_PROP]
+
+
+class WidgetSharing(GeneratorPlugin):
+    """
+    Shares identical widget meshes of all bones after widget generation.
+    """
+
+    priority = -700
+
+    def generate_widgets(self):
+        for pb in self.obj.pose.bones:
+            share_widget_mesh(pb.custom_shape)
+
+
+def share_rig_widgets(rig):
+    """
+    Enable widget mesh sharing for the generator of a rig.
+    """
+    WidgetSharing(rig.generator)
+
+#=============================================
+# Curve conversion
+#=============================================
+
+def edge_paths(count, edges):
+    """
+    Split edges into vertex index paths, returned as (path, cyclic) pairs.
+    Paths break at vertices not connecting exactly two edges.
+    """
+    adjacency = [[] for i in range(count)]
+    for a, b in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    used = set()
+
+    def walk(a, b):
+        path = [a]
+        while True:
+            used.add((min(a, b), max(a, b)))
+            path.append(b)
+            if len(adjacency[b]) != 2:
+                return path, False
+            c = next((n for n in adjacency[b] if (min(b, n), max(b, n)) not in used), None)
+            if c is None:
+                cyclic = path[0] == path[-1]
+                return (path[:-1] if cyclic else path), cyclic
+            a, b = b, c
+
+    paths = []
+    for ends in (True, False):
+        for a in range(count):
+            if (len(adjacency[a]) != 2) == ends:
+                for b in adjacency[a]:
+                    if (min(a, b), max(a, b)) not in used:
+                        paths.append(walk(a, b))
+    return paths
+
+def widget_object_copy(obj, data):
+    """
+    New widget object for converted data, placed like and linked next to obj.
+    """
+    widget = bpy.data.objects.new(obj.name, data)
+    widget.matrix_world = obj.matrix_world
+    for collection in obj.users_collection:
+        collection.objects.link(widget)
+    return widget
+
+def widget_mesh_to_curve(obj):
+    """
+    Curve widget with a poly spline along every edge path of a mesh widget.
+    A shared original mesh is remembered, so converting back can reuse it while it exists.
+    """
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    co = co.reshape(-1, 3)
+
+    curve = bpy.data.curves.new(obj.name, 'CURVE')
+    curve.dimensions = '3D'
+    for path, cyclic in edge_paths(len(co), edges.reshape(-1, 2).tolist()):
+        spline = curve.splines.new('POLY')
+        spline.points.add(len(path) - 1)
+        points = np.ones((len(path), 4), dtype=np.float32)
+        points[:, :3] = co[path]
+        spline.points.foreach_set('co', points.ravel())
+        spline.use_cyclic_u = cyclic
+    if mesh.get(WGT_HASH_PROP):
+        curve[WGT_MESH_PROP] = mesh.name
+    return widget_object_copy(obj, curve)
+
+def widget_curve_to_mesh(obj):
+    """
+    Mesh widget of a curve widget's control points, reusing its original mesh if known.
+    """
+    curve = obj.data
+    mesh = bpy.data.meshes.get(curve.get(WGT_MESH_PROP, ""))
+    if mesh and mesh.get(WGT_HASH_PROP):
+        return widget_object_copy(obj, mesh)
+
+    verts = []
+    edges = []
+    for spline in curve.splines:
+        points = spline.bezier_points if spline.type == 'BEZIER' else spline.points
+        if len(points) < 2:
+            continue
+        co = np.empty(len(points) * len(points[0].co), dtype=np.float32)
+        points.foreach_get('co', co)
+        co = co.reshape(len(points), -1)[:, :3]
+        # Loop edges end with the closing edge
+        loop = widget_loop_edges(len(co), sum(len(v) for v in verts))
+        edges.append(loop if spline.use_cyclic_u and len(co) > 2 else loop[:-1])
+        verts.append(co)
+
+    widget = widget_object_copy(obj, bpy.data.meshes.new(obj.name))
+    if verts:
+        widget_mesh_build(widget, np.concatenate(verts), np.concatenate(edges))
+    return widget
+
+#=============================================
+# Geometry builder
+#=============================================
+
+def widget_circle(segments=32, radius=0.5, y=0.0):
+    """
+    Vertex array of a circle in the XZ plane, starting at +Z towards -X.
+    """
+    angles = np.arange(segments) * (2 * pi / segments)
+    return np.column_stack((-radius * np.sin(angles), np.full(segments, y), radius * np.cos(angles)))
+
+def widget_loop_edges(count, start=0):
+    """
+    Edge array closing a loop of count vertices, starting at index start.
+    """
+    indices = np.arange(start, start + count)
+    return np.column_stack((np.roll(indices, -1), indices))
+
+def widget_mesh_build(obj, verts, edges, scale=1.0, loops=(), loop_totals=()):
+    """
+    Write scaled vertex and edge arrays (and optional face loops) into a widget mesh and share it.
+    """
+    verts = np.asarray(verts, dtype=np.float32) * scale
+    edges = np.asarray(edges, dtype=np.int32)
+    mesh = obj.data
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set('co', verts.ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set('vertices', edges.ravel())
+    if len(loop_totals):
+        loop_totals = np.asarray(loop_totals, dtype=np.int32)
+        mesh.loops.add(len(loops))
+        mesh.loops.foreach_set('vertex_index', np.asarray(loops, dtype=np.int32))
+        mesh.polygons.add(len(loop_totals))
+        mesh.polygons.foreach_set('loop_start', np.cumsum(loop_totals) - loop_totals)
+        mesh.polygons.foreach_set('loop_total', loop_totals)
+        # Face loops only carry vertex indices, derive their edges
+        mesh.update(calc_edges=True)
+        mesh.validate()
+    else:
+        mesh.update()
+    share_widget_mesh(obj)
+
+#=============================================
+# Widgets
+#=============================================
+
+_text_meshes = {}  # Converted label geometry per text
+
+def text_widget_arrays(text):
+    """
+    Vertex and edge arrays of a centered text outline, facing the bone's Z axis.
+    Converted once per text, the label does not follow the gear size.
+    """
+    if text not in _text_meshes:
         D = bpy.data
-        text_name = WGT_PREFIX + rig.name + '_' + bone_name + '_TEMP'
-        text_crv = D.curves.new(text_name, 'FONT')
+        text_crv = D.curves.new(WGT_PREFIX + "TEXT_TEMP", 'FONT')
         text_crv.fill_mode = 'NONE'
         text_crv.align_x = 'CENTER'
         text_crv.align_y = 'CENTER'
         text_crv.overflow = 'SCALE'
         text_crv.text_boxes[0].width = 1
         text_crv.text_boxes[0].x = -0.5
-        text = text.replace("\\n", "\n")
-        text_crv.body = text
+        text_crv.body = text.replace("\\n", "\n")
 
-        text_crv_obj = D.objects.new(text_name, text_crv)
+        text_crv_obj = D.objects.new(text_crv.name, text_crv)
         text_mesh = D.meshes.new_from_object(text_crv_obj)
         D.objects.remove(text_crv_obj)
         D.curves.remove(text_crv)
-        text = D.objects.new(text_name, text_mesh)
-        obj_to_bone(text, rig, bone_name, bone_transform_name)
-        text.rotation_euler[0] -= pi / 2
-
-        bpy.context.scene.collection.objects.link(text)
-        bpy.context.scene.collection.objects.link(obj)
-        override = bpy.context.copy()
-        override['selected_objects'] = [text, obj]
-        override['active_object'] = obj
-        override['view_layer']['objects'] = {}
-        override['view_layer']['objects']['selected'] = [text, obj]
-        override['view_layer']['objects']['active'] = obj
-        bpy.ops.object.join(override)
-        #bpy.context.scene.collection.objects.unlink(text)
-        #bpy.context.scene.collection.objects.unlink(obj)
+
+        co = np.empty(len(text_mesh.vertices) * 3, dtype=np.float32)
+        text_mesh.vertices.foreach_get('co', co)
+        edges = np.empty(len(text_mesh.edges) * 2, dtype=np.int32)
+        text_mesh.edges.foreach_get('vertices', edges)
+        D.meshes.remove(text_mesh)
+
+        # Rotate -90 degrees around X: (x, y, z) -> (x, z, -y)
+        co = co.reshape(-1, 3)
+        _text_meshes[text] = (np.column_stack((co[:, 0], co[:, 2], -co[:, 1])), edges.reshape(-1, 2))
+    return _text_meshes[text]
+
+def create_properties_widget(rig, bone_name, size=1.0, bone_transform_name=None, text=""):
+    """
+    Creates a property (gear) widget with additional text.
+    """
+    obj = create_gear_widget(rig, bone_name, size * 8.887729560524728, bone_transform_name)
+
+    if text and obj:
+        mesh = obj.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get('co', co)
+        edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get('vertices', edges)
+        co = co.reshape(-1, 3)
+
+        text_co, text_edges = text_widget_arrays(text)
+        mesh.clear_geometry()
+        widget_mesh_build(
+            obj,
+            np.concatenate((co, text_co)),
+            np.concatenate((edges.reshape(-1, 2), text_edges + len(co)))
+        )
 
 
 def create_sub_tweak_widget(rig, bone_name, size=1.0, bone_transform_name=None):
@@ -74,24 +317,15 @@ def create_sub_tweak_widget(rig, bone_name, size=1.0, bone_transform_name=None):
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
         verts = [
-            (0.0000, 0.0000, size),
-            (0.0000, 0.0000, -size),
-            (0.0000, size, 0.0000),
-            (-size, 0.0000, 0.0000),
-            (size, 0.0000, 0.0000),
-            (0.0000, 0.0000, 0.0000)
-        ]
-        edges = [
-            (0, 5),
-            (1, 5),
-            (5, 2),
-            (5, 3),
-            (4, 5)
+            (0, 0, 1),
+            (0, 0, -1),
+            (0, 1, 0),
+            (-1, 0, 0),
+            (1, 0, 0),
+            (0, 0, 0),
         ]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
-        mesh.update()
+        edges = [(0, 5), (1, 5), (5, 2), (5, 3), (4, 5)]
+        widget_mesh_build(obj, verts, edges, size)
 
 
 def create_square_widget(rig, bone_name, size=1.0, bone_transform_name=None):
@@ -101,19 +335,13 @@ def create_square_widget(rig, bone_name, size=1.0, bone_transform_name=None):
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
         verts = [
-            (  0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
-            ( -0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
-            (  0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
-            ( -0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
+            ( 0.5, -2.9802322387695312e-08,  0.5),
+            (-0.5, -2.9802322387695312e-08,  0.5),
+            ( 0.5,  2.9802322387695312e-08, -0.5),
+            (-0.5,  2.9802322387695312e-08, -0.5),
         ]
-        
         edges = [(0, 1), (2, 3), (0, 2), (3, 1)]
-        faces = []
-
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, faces)
-        mesh.update()
-        mesh.update()
+        widget_mesh_build(obj, verts, edges, size)
 
 
 def create_simple_arrow_widget(rig, bone_name, size=1.0, bone_transform_name=None, invert=False):
@@ -122,22 +350,17 @@ def create_simple_arrow_widget(rig, bone_name, size=1.0, bone_transform_name=Non
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
-        y = -1 if invert else 1
-        verts = [
-            (0 * size, 0 * size, 0 * size),
-            (0 * size, 0.85 * size * y, 0 * size),
-            (0.1 * size, 0.85 * size * y, 0 * size),
-            (0 * size, 1 * size * y, 0 * size),
-            (-0.1 * size, 0.85 * size * y, 0 * size)
-        ]
-
+        verts = np.array([
+            (0, 0, 0),
+            (0, 0.85, 0),
+            (0.1, 0.85, 0),
+            (0, 1, 0),
+            (-0.1, 0.85, 0),
+        ])
+        if invert:
+            verts[:, 1] *= -1
         edges = [(0, 1), (1, 2), (2, 3), (3, 4), (1, 4)]
-        faces = []
-
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, faces)
-        mesh.update()
-        mesh.update()
+        widget_mesh_build(obj, verts, edges, size)
 
 
 def create_wide_arrow_widget(rig, bone_name, size=1.0, bone_transform_name=None, invert=False):
@@ -146,24 +369,19 @@ def create_wide_arrow_widget(rig, bone_name, size=1.0, bone_transform_name=None,
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
-        y = -1 if invert else 1
-        verts = [
-            (0.1 * size, 0 * size, 0*size),
-            (0.1 * size, 0.7 * size * y, 0 * size),
-            (-0.1 * size, 0 * size, 0 * size),
-            (-0.1 * size, 0.7 * size * y, 0 * size),
-            (0.2 * size, 0.7 * size * y, 0 * size),
-            (0 * size, 1 * size * y, 0 * size),
-            (-0.2 * size, 0.7 * size * y, 0 * size),
-        ]
-
+        verts = np.array([
+            (0.1, 0, 0),
+            (0.1, 0.7, 0),
+            (-0.1, 0, 0),
+            (-0.1, 0.7, 0),
+            (0.2, 0.7, 0),
+            (0, 1, 0),
+            (-0.2, 0.7, 0),
+        ])
+        if invert:
+            verts[:, 1] *= -1
         edges = [(0, 1), (2, 3), (1, 4), (4, 5), (3, 6), (5, 6), (0, 2)]
-        faces = []
-
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, faces)
-        mesh.update()
-        mesh.update()
+        widget_mesh_build(obj, verts, edges, size)
 
 def create_pin_widget(rig, bone_name, size=1.0, bone_transform_name=None, axis_size=1.0, cap_size=1.0, square=False, invert=False):
     """
@@ -171,66 +389,15 @@ def create_pin_widget(rig, bone_name, size=1.0, bone_transform_name=None, axis_s
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
-        y = -1 if invert else 1
-        axs = axis_size
-        cps = cap_size
-        verts = [
-            # Needle
-            (0, 0, 0),
-            (0, size*axs*y, 0),
-            # Head
-            (-0.5*size*cps, size*axs*y, -0.5*size*cps),
-            (0.5*size*cps, size*axs*y, -0.5*size*cps),
-            (-0.5*size*cps, size*axs*y, 0.5*size*cps),
-            (0.5*size*cps, size*axs*y, 0.5*size*cps),
-        ] if square else \
-        [
-            # Needle
-            (0, 0, 0),
-            (0, size*axs*y, 0),
-            # Head
-            (0*size*cps, size*axs*y, 0.5*size*cps),
-            (-0.0975452*size*cps, size*axs*y, 0.490393*size*cps),
-            (-0.191342*size*cps, size*axs*y, 0.46194*size*cps),
-            (-0.277785*size*cps, size*axs*y, 0.415735*size*cps),
-            (-0.353553*size*cps, size*axs*y, 0.353553*size*cps),
-            (-0.415735*size*cps, size*axs*y, 0.277785*size*cps),
-            (-0.46194*size*cps, size*axs*y, 0.191342*size*cps),
-            (-0.490393*size*cps, size*axs*y, 0.0975452*size*cps),
-            (-0.5*size*cps, size*axs*y, 3.7749e-08*size*cps),
-            (-0.490393*size*cps, size*axs*y, -0.0975451*size*cps),
-            (-0.46194*size*cps, size*axs*y, -0.191342*size*cps),
-            (-0.415735*size*cps, size*axs*y, -0.277785*size*cps),
-            (-0.353553*size*cps, size*axs*y, -0.353553*size*cps),
-            (-0.277785*size*cps, size*axs*y, -0.415735*size*cps),
-            (-0.191342*size*cps, size*axs*y, -0.46194*size*cps),
-            (-0.097545*size*cps, size*axs*y, -0.490393*size*cps),
-            (1.62921e-07*size*cps, size*axs*y, -0.5*size*cps),
-            (0.0975454*size*cps, size*axs*y, -0.490393*size*cps),
-            (0.191342*size*cps, size*axs*y, -0.46194*size*cps),
-            (0.277785*size*cps, size*axs*y, -0.415735*size*cps),
-            (0.353554*size*cps, size*axs*y, -0.353553*size*cps),
-            (0.415735*size*cps, size*axs*y, -0.277785*size*cps),
-            (0.46194*size*cps, size*axs*y, -0.191341*size*cps),
-            (0.490393*size*cps, size*axs*y, -0.0975447*size*cps),
-            (0.5*size*cps, size*axs*y, 4.828e-07*size*cps),
-            (0.490393*size*cps, size*axs*y, 0.0975457*size*cps),
-            (0.46194*size*cps, size*axs*y, 0.191342*size*cps),
-            (0.415734*size*cps, size*axs*y, 0.277786*size*cps),
-            (0.353553*size*cps, size*axs*y, 0.353554*size*cps),
-            (0.277785*size*cps, size*axs*y, 0.415735*size*cps),
-            (0.191341*size*cps, size*axs*y, 0.46194*size*cps),
-            (0.0975444*size*cps, size*axs*y, 0.490393*size*cps),
-        ]
-
-        edges = [(0, 1), (4, 2), (2, 3), (3, 5), (5, 4), ] if square else \
-        [(0, 1), (3, 2), (4, 3), (5, 4), (6, 5), (7, 6), (8, 7), (9, 8), (10, 9), (11, 10),
-        (12, 11), (13, 12), (14, 13), (15, 14), (16, 15), (17, 16), (18, 17), (19, 18), (20, 19), (21, 20),
-        (22, 21), (23, 22), (24, 23), (25, 24), (26, 25), (27, 26), (28, 27), (29, 28), (30, 29), (31, 30),
-        (32, 31), (33, 32), (2, 33), ]
-        faces = []
-
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, faces)
-        mesh.update()
-        mesh.update()
\ No newline at end of file
+        y = -axis_size if invert else axis_size
+        if square:
+            cap = np.array([(-0.5, 0, -0.5), (0.5, 0, -0.5), (-0.5, 0, 0.5), (0.5, 0, 0.5)]) * cap_size
+            cap[:, 1] = y
+            cap_edges = [(4, 2), (2, 3), (3, 5), (5, 4)]
+        else:
+            cap = widget_circle(32, 0.5 * cap_size, y)
+            cap_edges = widget_loop_edges(32, 2)
+        # Needle and head
+        verts = np.concatenate(((0, 0, 0), (0, y, 0), cap.ravel())).reshape(-1, 3)
+        edges = np.concatenate(((0, 1), np.ravel(cap_edges))).reshape(-1, 2)
+        widget_mesh_build(obj, verts, edges, size)
@@ -0,0 +1,184 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+
+from bpy.app.handlers import persistent
+
+from .widgets_bendy import WGT_PREFIX, WGT_LOD_PROP
+
+
+#=============================================
+# Index
+#=============================================
+
+def is_widget_rig(obj):
+    '''Armatures whose custom shapes are indexed; metarigs are skipped'''
+    return obj and obj.type == 'ARMATURE' and not obj.data.rigify_layers
+
+class WidgetIndex():
+    """
+    Reverse index of widget objects to the (armature, bone) pairs using them.
+    Armatures changed in the depsgraph are rescanned on the next query;
+    undo, redo and file loading invalidate the whole index. Changes that never
+    reach the depsgraph (linked libraries, other view layers, scripts) are
+    missed, so operators deleting widgets use widget_users_scan instead.
+    """
+
+    def __init__(self):
+        self.widgets = {}  # widget name -> {(rig name, bone name)}
+        self.rigs = {}  # rig name -> {bone name: widget name}
+        self.dirty = set()
+        self.valid = False
+
+    def invalidate(self):
+        self.valid = False
+
+    def tag(self, rig_name):
+        self.dirty.add(rig_name)
+
+    def remove_rig(self, rig_name):
+        for bone, widget in self.rigs.pop(rig_name, {}).items():
+            users = self.widgets.get(widget)
+            if users is not None:
+                users.discard((rig_name, bone))
+                if not users:
+                    del self.widgets[widget]
+
+    def add_rig(self, obj):
+        bones = {pb.name: pb.custom_shape.name for pb in obj.pose.bones if pb.custom_shape}
+        self.rigs[obj.name] = bones
+        for bone, widget in bones.items():
+            self.widgets.setdefault(widget, set()).add((obj.name, bone))
+
+    def rebuild(self):
+        self.widgets.clear()
+        self.rigs.clear()
+        self.dirty.clear()
+        for obj in bpy.data.objects:
+            if is_widget_rig(obj):
+                self.add_rig(obj)
+        self.valid = True
+
+    def refresh(self):
+        '''Bring the index up to date, rescanning only changed armatures'''
+        if not self.valid:
+            self.rebuild()
+            return self
+        # Widgets renamed or deleted outside of the widget operators
+        objects = bpy.data.objects
+        for widget in [w for w in self.widgets if w not in objects]:
+            self.dirty.update(rig_name for rig_name, bone in self.widgets[widget])
+        while self.dirty:
+            rig_name = self.dirty.pop()
+            self.remove_rig(rig_name)
+            obj = bpy.data.objects.get(rig_name)
+            if is_widget_rig(obj):
+                self.add_rig(obj)
+        # Armatures renamed or deleted since the last query
+        for rig_name in [r for r in self.rigs if not is_widget_rig(bpy.data.objects.get(r))]:
+            self.remove_rig(rig_name)
+        return self
+
+    def rename(self, old, new):
+        '''Keep the index valid after renaming a widget object'''
+        users = self.widgets.pop(old, None)
+        if users:
+            self.widgets[new] = users
+            for rig_name, bone in users:
+                self.rigs[rig_name][bone] = new
+
+    ####################################################
+    # Queries
+
+    def users(self, widget_name):
+        '''(armature, bone) name pairs using a widget'''
+        return self.refresh().widgets.get(widget_name, set())
+
+    def shared(self, minimum=2):
+        '''Widget names used by at least minimum bones'''
+        return [w for w, users in self.refresh().widgets.items() if len(users) >= minimum]
+
+
+widget_index = WidgetIndex()
+
+#=============================================
+# Live scans
+#=============================================
+
+def widget_users_scan(widget_names=None):
+    '''(armature, bone) name pairs per widget from one pass over all armatures, optionally limited to some widgets'''
+    users = {}
+    for obj in bpy.data.objects:
+        if not is_widget_rig(obj):
+            continue
+        for pb in obj.pose.bones:
+            widget = pb.custom_shape
+            if widget and (widget_names is None or widget.name in widget_names):
+                users.setdefault(widget.name, []).append((obj.name, pb.name))
+    return users
+
+def widget_in_use(obj):
+    '''Whether anything but its collections and fake user holds the widget, custom shapes count as users'''
+    return obj.users > len(obj.users_collection) + obj.use_fake_user
+
+def widget_orphans():
+    '''Widget objects not used by any bone, or by bones temporarily swapped to LOD variants'''
+    widgets = set(widget_users_scan())
+    for obj in bpy.data.objects:
+        if is_widget_rig(obj):
+            widgets.update(obj.get(WGT_LOD_PROP, {}).values())
+    return [
+        obj for obj in bpy.data.objects
+        if obj.name.startswith(WGT_PREFIX) and obj.name not in widgets
+    ]
+
+#=============================================
+# Handlers
+#=============================================
+
+@persistent
+def widget_index_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        obj = update.id.original if isinstance(update.id, bpy.types.Object) else None
+        if obj and obj.type == 'ARMATURE':
+            widget_index.tag(obj.name)
+
+@persistent
+def widget_index_invalidate(*args):
+    widget_index.invalidate()
+
+handlers = (
+    (bpy.app.handlers.depsgraph_update_post, widget_index_depsgraph_update),
+    (bpy.app.handlers.undo_post, widget_index_invalidate),
+    (bpy.app.handlers.redo_post, widget_index_invalidate),
+    (bpy.app.handlers.load_post, widget_index_invalidate),
+)
+
+def widget_index_register():
+    for handler_list, handler in handlers:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+def widget_index_unregister():
+    for handler_list, handler in handlers:
+        if handler in handler_list:
+            handler_list.remove(handler)
+    widget_index.invalidate()
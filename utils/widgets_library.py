@@ -0,0 +1,151 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import hashlib
+import importlib
+import numpy as np
+import os
+
+from rigify.utils.widgets import create_widget
+
+from .widgets_bendy import widget_mesh_build
+
+
+# Bump whenever the library format changes, so stale libraries get rebuilt
+WIDGET_LIBRARY_VERSION = 1
+
+# Modules whose widget shapes get baked, any change in them starts a new library
+WIDGET_SOURCES = (
+    "rigify.utils.widgets",
+    "rigify.utils.widgets_basic",
+    "rigify.utils.widgets_special",
+    "rigify.rigs.widgets",
+    __package__ + ".widgets_bendy",
+)
+
+#=============================================
+# Library
+#=============================================
+
+def widget_sources_key():
+    '''Short digest of the rigify version and the widget modules of rigify and Bendify'''
+    import rigify
+    digest = hashlib.sha1(repr(rigify.bl_info.get('version')).encode())
+    for name in WIDGET_SOURCES:
+        try:
+            path = importlib.import_module(name).__file__
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except (ImportError, OSError):
+            digest.update(name.encode())
+    return digest.hexdigest()[:12]
+
+class WidgetLibrary():
+    """
+    Canonical widget shapes stored as arrays in a .npz file, keyed by the library
+    format, the rigify version and the widget sources the shapes were baked from.
+    Shapes are baked the first time a widget kind is built with default settings.
+    File errors only cost the cache, widgets are then built the regular way.
+    """
+
+    def __init__(self, version=WIDGET_LIBRARY_VERSION):
+        self.version = version
+        self.shapes = None
+        self.key = None
+
+    @property
+    def path(self):
+        if self.key is None:
+            self.key = widget_sources_key()
+        folder = bpy.utils.user_resource('CONFIG', path="bendify", create=True)
+        return os.path.join(folder, "widgets_v{}_{}.npz".format(self.version, self.key))
+
+    def load(self):
+        self.shapes = {}
+        try:
+            path = self.path
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    for key in data.files:
+                        kind, array = key.rsplit('.', 1)
+                        self.shapes.setdefault(kind, {})[array] = data[key]
+        except Exception as e:
+            print("Bendify widget library not loaded: " + str(e))
+            self.shapes = {}
+        return self.shapes
+
+    def save(self):
+        try:
+            np.savez_compressed(self.path, **{
+                kind + '.' + array: values
+                for kind, shape in self.shapes.items() for array, values in shape.items()
+            })
+        except Exception as e:
+            print("Bendify widget library not saved: " + str(e))
+
+    def get(self, kind):
+        if self.shapes is None:
+            self.load()
+        return self.shapes.get(kind)
+
+    def add(self, kind, mesh):
+        '''Bake the geometry of a mesh as canonical shape of a widget kind'''
+        if self.shapes is None:
+            self.load()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get('co', co)
+        edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get('vertices', edges)
+        loops = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loops)
+        totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_total', totals)
+        self.shapes[kind] = {
+            "verts": co.reshape(-1, 3),
+            "edges": edges.reshape(-1, 2),
+            "loops": loops,
+            "totals": totals,
+        }
+        self.save()
+
+    def clear(self):
+        self.shapes = {}
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            print("Bendify widget library not removed: " + str(e))
+
+
+widget_library = WidgetLibrary()
+
+def create_library_widget(rig, bone_name, kind, scale=1.0, bone_transform_name=None):
+    """
+    Create a widget from its baked library shape. Returns the widget object,
+    None if the shape is not in the library or the widget already exists.
+    """
+    shape = widget_library.get(kind)
+    if shape is None:
+        return None
+    obj = create_widget(rig, bone_name, bone_transform_name)
+    if obj != None:
+        widget_mesh_build(obj, shape["verts"], shape["edges"], scale, shape["loops"], shape["totals"])
+    return obj
@@ -0,0 +1,243 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import hashlib
+import numpy as np
+
+from bpy.app.handlers import persistent
+
+from .widgets_bendy import WGT_PREFIX, WGT_HASH_PROP, WGT_LOD_PROP, widget_mesh_build, widget_mesh_hash
+from .widgets_index import widget_index
+
+
+#=============================================
+# Simplification
+#=============================================
+
+def simplify_widget_arrays(co, edges, cells=4):
+    """
+    Wire-only simplification by vertex clustering: vertices are snapped to a grid
+    of cells per widget extent, merged per cell and collapsed edges dropped.
+    """
+    co = np.reshape(co, (-1, 3))
+    edges = np.reshape(edges, (-1, 2))
+    if not len(co):
+        return co, edges
+    extent = np.ptp(co, axis=0).max() or 1.0
+    grid = np.round((co - co.min(axis=0)) * (cells / extent)).astype(np.int64)
+    _, index, inverse = np.unique(grid, axis=0, return_index=True, return_inverse=True)
+    edges = np.reshape(inverse, -1)[edges]
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    if len(edges):
+        edges = np.unique(np.sort(edges, axis=1), axis=0)
+    return co[index], edges
+
+def widget_arrays(widget):
+    '''Vertex and edge arrays of a mesh or curve widget'''
+    mesh = widget.data if widget.type == 'MESH' else bpy.data.meshes.new_from_object(widget)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    if mesh is not widget.data:
+        bpy.data.meshes.remove(mesh)
+    return co, edges
+
+def rig_editable(obj):
+    '''Linked armatures and overrides of linked armature data cannot take LOD widgets'''
+    return not obj.library and not obj.data.library
+
+#=============================================
+# Variants
+#=============================================
+
+class WidgetLod():
+    """
+    Simplified variants of widgets, keyed by the shared geometry hash, so every
+    widget with the same shape maps to one LOD object. Bones are swapped to
+    their variants while playback runs; the original widget names are stored
+    on the armature until they are restored.
+    """
+
+    def __init__(self):
+        self.variants = {}  # (geometry hash, cells) -> LOD widget name or None
+
+    def widget_key(self, widget):
+        if widget.type == 'MESH':
+            return widget.data.get(WGT_HASH_PROP) or widget_mesh_hash(widget.data)
+        if widget.type == 'CURVE':
+            curve = widget.data
+            settings = (curve.name, curve.bevel_depth, curve.bevel_resolution, curve.resolution_u)
+            return hashlib.sha1(repr(settings).encode()).hexdigest()
+        return None
+
+    def variant(self, widget, cells=4, ratio=0.75):
+        '''Simplified widget object, or None if simplifying would not pay off'''
+        key = self.widget_key(widget)
+        if not key:
+            return None
+        if (key, cells) in self.variants:
+            name = self.variants[(key, cells)]
+            lod = bpy.data.objects.get(name) if name else None
+            if lod or not name:
+                return lod
+
+        co, edges = widget_arrays(widget)
+        verts, lod_edges = simplify_widget_arrays(co, edges, cells)
+        if widget.type == 'MESH' and len(verts) * 3 > len(co) * ratio:
+            self.variants[(key, cells)] = None
+            return None
+
+        name = WGT_PREFIX + "LOD-" + key[-12:] + "-" + str(cells)
+        lod = bpy.data.objects.get(name)
+        if lod:
+            lod.data = bpy.data.meshes.new(name)
+        else:
+            lod = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+        widget_mesh_build(lod, verts, lod_edges)
+        self.variants[(key, cells)] = lod.name
+        return lod
+
+    ####################################################
+    # Swapping
+
+    def swap(self, scene, cells=4):
+        '''Assign LOD variants to all bones of the scene's editable armatures'''
+        rigs = widget_index.refresh().rigs
+        for obj in scene.objects:
+            if obj.name not in rigs or WGT_LOD_PROP in obj or not rig_editable(obj):
+                continue
+            originals = {}
+            try:
+                self.swap_rig(obj, rigs[obj.name], originals, cells)
+                if originals:
+                    obj[WGT_LOD_PROP] = originals
+            except (AttributeError, RuntimeError, TypeError) as e:
+                print("Bendify: widget LOD skipped for " + obj.name + ": " + str(e))
+                self.restore_rig(obj, originals)
+            widget_index.tag(obj.name)
+
+    def swap_rig(self, obj, rig_widgets, originals, cells):
+        '''Swap one armature, recording every swapped bone in originals'''
+        objects = bpy.data.objects
+        bones = obj.pose.bones
+        widgets = {}
+        for bone, widget_name in rig_widgets.items():
+            pb = bones.get(bone)
+            widget = objects.get(widget_name)
+            if not pb or not widget:
+                continue
+            if widget_name not in widgets:
+                widgets[widget_name] = self.variant(widget, cells)
+            lod = widgets[widget_name]
+            if lod:
+                originals[bone] = widget_name
+                pb.custom_shape = lod
+
+    def restore_rig(self, obj, originals):
+        objects = bpy.data.objects
+        bones = obj.pose.bones
+        for bone, widget_name in originals.items():
+            pb = bones.get(bone)
+            widget = objects.get(widget_name)
+            if pb and widget:
+                pb.custom_shape = widget
+
+    def restore(self):
+        '''Reassign the original widgets of all swapped armatures'''
+        for obj in bpy.data.objects:
+            if obj.type != 'ARMATURE' or WGT_LOD_PROP not in obj or not rig_editable(obj):
+                continue
+            try:
+                self.restore_rig(obj, obj[WGT_LOD_PROP])
+                del obj[WGT_LOD_PROP]
+            except (AttributeError, RuntimeError, TypeError) as e:
+                print("Bendify: widget LOD restore failed for " + obj.name + ": " + str(e))
+            widget_index.tag(obj.name)
+
+
+widget_lod = WidgetLod()
+
+#=============================================
+# Handlers
+#=============================================
+
+def widget_lod_start(scene):
+    settings = getattr(scene, 'bendify', None)
+    if settings and settings.widgets_lod:
+        widget_lod.swap(scene, settings.widgets_lod_cells)
+
+@persistent
+def widget_lod_playback_pre(scene, *args):
+    widget_lod_start(scene)
+
+@persistent
+def widget_lod_playback_post(scene, *args):
+    widget_lod.restore()
+
+@persistent
+def widget_lod_load_post(*args):
+    widget_lod.variants.clear()
+    widget_lod.restore()
+
+_playing = False
+
+def widget_lod_poll():
+    '''Playback watcher for Blender versions without playback handlers'''
+    global _playing
+    wm = bpy.context.window_manager
+    playing = bool(wm) and any(win.screen.is_animation_playing for win in wm.windows)
+    if playing != _playing:
+        _playing = playing
+        if playing:
+            widget_lod_start(bpy.context.scene)
+        else:
+            widget_lod.restore()
+    return 0.2
+
+def playback_handlers():
+    handlers = bpy.app.handlers
+    if hasattr(handlers, 'animation_playback_pre'):
+        return (
+            (handlers.animation_playback_pre, widget_lod_playback_pre),
+            (handlers.animation_playback_post, widget_lod_playback_post),
+        )
+    return ()
+
+def widget_lod_register():
+    for handler_list, handler in playback_handlers():
+        if handler not in handler_list:
+            handler_list.append(handler)
+    if not playback_handlers() and not bpy.app.timers.is_registered(widget_lod_poll):
+        bpy.app.timers.register(widget_lod_poll, first_interval=0.2, persistent=True)
+    if widget_lod_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(widget_lod_load_post)
+
+def widget_lod_unregister():
+    for handler_list, handler in playback_handlers():
+        if handler in handler_list:
+            handler_list.remove(handler)
+    if bpy.app.timers.is_registered(widget_lod_poll):
+        bpy.app.timers.unregister(widget_lod_poll)
+    if widget_lod_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(widget_lod_load_post)
+    widget_lod.restore()
+    widget_lod.variants.clear()
@@ -0,0 +1,161 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+import bpy
+import json
+import numpy as np
+
+from fnmatch import fnmatchcase
+
+from .widgets_bendy import WGT_PREFIX, widget_mesh_build, widget_mesh_hash
+
+
+WIDGET_SET_VERSION = 1
+
+#=============================================
+# Export
+#=============================================
+
+def mesh_arrays(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+    totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', totals)
+    return {
+        "verts": np.round(co, 6).tolist(),
+        "edges": edges.tolist(),
+        "loops": loops.tolist(),
+        "totals": totals.tolist(),
+    }
+
+def widget_set_export(obj, path, pattern="*"):
+    """
+    Write the mesh custom shapes of an armature's bones to a widget set file,
+    storing every distinct geometry once. Returns exported and skipped bone counts.
+    """
+    shapes = {}
+    bones = {}
+    hashes = {}
+    skipped = 0
+    for pb in obj.pose.bones:
+        widget = pb.custom_shape
+        if not widget or not fnmatchcase(pb.name, pattern):
+            continue
+        if widget.type != 'MESH':
+            skipped += 1
+            continue
+        if widget.data not in hashes:
+            key = widget_mesh_hash(widget.data)
+            hashes[widget.data] = key
+            if key not in shapes:
+                shapes[key] = mesh_arrays(widget.data)
+        bones[pb.name] = {
+            "shape": hashes[widget.data],
+            "scale": pb.custom_shape_scale,
+            "bone_size": pb.use_custom_shape_bone_size,
+            "transform": pb.custom_shape_transform.name if pb.custom_shape_transform else None,
+        }
+
+    with open(path, 'w') as f:
+        json.dump({"version": WIDGET_SET_VERSION, "shapes": shapes, "bones": bones}, f, separators=(',', ':'))
+    return len(bones), skipped
+
+#=============================================
+# Import
+#=============================================
+
+def widget_collection(obj):
+    '''Collection of the armature's existing widgets, or a new hidden one'''
+    for pb in obj.pose.bones:
+        if pb.custom_shape and pb.custom_shape.users_collection:
+            return pb.custom_shape.users_collection[0]
+    name = "WGTS_" + obj.name
+    collection = bpy.data.collections.get(name)
+    if not collection:
+        collection = bpy.data.collections.new(name)
+        bpy.context.scene.collection.children.link(collection)
+        collection.hide_viewport = True
+        collection.hide_render = True
+    return collection
+
+def edge_set(edges):
+    return {tuple(sorted(edge)) for edge in np.reshape(edges, (-1, 2)).tolist()}
+
+def shape_matches(mesh, shape):
+    '''Whether a built widget mesh holds the exported geometry, faces included'''
+    arrays = mesh_arrays(mesh)
+    return len(arrays["verts"]) == len(shape["verts"]) \
+        and arrays["loops"] == list(shape["loops"]) \
+        and arrays["totals"] == list(shape["totals"]) \
+        and edge_set(arrays["edges"]) == edge_set(shape["edges"])
+
+def widget_set_import(obj, path, pattern="*"):
+    """
+    Assign the custom shapes of a widget set file to the matching bones of an
+    armature, building one widget object per distinct geometry. Returns the
+    number of assigned bones and the keys of shapes that did not survive the
+    round trip into a mesh.
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    entries = {
+        name: entry for name, entry in data["bones"].items()
+        if name in obj.pose.bones and fnmatchcase(name, pattern)
+    }
+    if not entries:
+        return 0, []
+
+    collection = widget_collection(obj)
+    widgets = {}
+    broken = []
+    for key in {entry["shape"] for entry in entries.values()}:
+        shape = data["shapes"][key]
+        name = WGT_PREFIX + obj.name + "_" + key[:12]
+        widget = bpy.data.objects.get(name)
+        if not widget or widget.type != 'MESH':
+            widget = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+            collection.objects.link(widget)
+        else:
+            widget.data = bpy.data.meshes.new(name)
+        widget_mesh_build(
+            widget,
+            np.reshape(shape["verts"], (-1, 3)),
+            np.reshape(shape["edges"], (-1, 2)),
+            1.0,
+            shape["loops"],
+            shape["totals"]
+        )
+        if not shape_matches(widget.data, shape):
+            broken.append(key)
+        widgets[key] = widget
+
+    for name, entry in entries.items():
+        pb = obj.pose.bones[name]
+        pb.custom_shape = widgets[entry["shape"]]
+        pb.custom_shape_scale = entry["scale"]
+        pb.use_custom_shape_bone_size = entry["bone_size"]
+        transform = entry["transform"]
+        pb.custom_shape_transform = obj.pose.bones.get(transform) if transform else None
+    return len(entries), broken
@@ -1,4 +1,5 @@
 import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 from mathutils import Color, Matrix
 
 from rigify.utils.widgets import obj_to_bone
@@ -8,6 +9,9 @@ from rigify.rigs.widgets import *
 
 from .utils.misc import attribute_return
 from .utils.widgets_bendy import *
+from .utils.widgets_library import create_library_widget, widget_library
+from .utils.widgets_index import widget_index, widget_in_use, widget_orphans, widget_users_scan
+from .utils.widgets_sets import widget_set_export, widget_set_import
 
 
 widgets_dict = {
@@ -230,14 +234,12 @@ class WidgetNamesMixin():
     def collect_widgets():
         D = bpy.data
         widgets = {}
-        for obj in D.objects:
-            if obj.type == 'ARMATURE' and not obj.data.rigify_layers:
-                for pbone in obj.pose.bones:
-                    if pbone.custom_shape:
-                        if not pbone.custom_shape in widgets:
-                            widgets[pbone.custom_shape] = {"rig": obj, "bone": pbone, "multi": False}
-                        else:
-                            widgets[pbone.custom_shape]["multi"] = True
+        for name, users in widget_index.refresh().widgets.items():
+            widget = D.objects.get(name)
+            if widget and users:
+                rig_name, bone_name = min(users)
+                rig = D.objects[rig_name]
+                widgets[widget] = {"rig": rig, "bone": rig.pose.bones[bone_name], "multi": len(users) > 1}
         return widgets
 
 
@@ -358,38 +360,77 @@ class BENDIFY_OT_WidgetsSelect(bpy.types.Operator):
         return context.mode == 'POSE' and context.selected_pose_bones
 
     def execute(self, context):  
-        rig = context.active_object
-
-        for pb in context.selected_pose_bones:
-            if not self.widget == 'KEEP':
-                # Delete old widget
-                wgt_name = "WGT-" + rig.name + "_" + pb.name
-                if wgt_name in bpy.data.objects:
-                    bpy.data.objects.remove(bpy.data.objects[wgt_name])
-                
-                # Basic viewport settings
-                pb.custom_shape_scale = 1.0
-                pb.use_custom_shape_bone_size = True
-
-                # Create new widgets
-                kwlist = widgets_dict[self.widget]["kwargs"]
-                kwargs = {"rig": rig, "bone_name": pb.name}
-                for kw in kwlist:
-                    kwargs[kw] = getattr(self, kw)
-                widgets_dict[self.widget]["function"](**kwargs)
-                wgt_obj = bpy.data.objects[wgt_name]
-
-                # Additinal resizing if missing
-                if not "size" in kwargs and not "radius" in kwargs:
-                    for v in wgt_obj.data.vertices:
-                        v.co *= self.size
-                
-                # Select new widget as custom shape
-                if wgt_name in bpy.data.objects:
-                    pb.custom_shape = wgt_obj
+        if self.widget == 'KEEP':
+            return {'FINISHED'}
+
+        D = bpy.data
+        pose_bones = context.selected_pose_bones
+        first = context.active_pose_bone if context.active_pose_bone in pose_bones else pose_bones[0]
+        rig = first.id_data
+        rigs = {pb.id_data for pb in pose_bones}
+
+        # Release old widgets, keep them to restore if the new one fails
+        old_shapes = [(pb, pb.custom_shape) for pb in pose_bones]
+        old_widgets = []
+        for pb, shape in old_shapes:
+            if shape and shape.name.startswith(WGT_PREFIX) and shape not in old_widgets:
+                old_widgets.append(shape)
+            pb.custom_shape = None
+        for r in rigs:
+            widget_index.tag(r.name)
+        # Move the widget in the way of the new one, to a name of its other users if any
+        wgt_name = "WGT-" + rig.name + "_" + first.name
+        moved = D.objects.get(wgt_name)
+        if moved:
+            users = widget_index.users(wgt_name)
+            rig_name, bone_name = min(users) if users else (rig.name, first.name + "_old")
+            moved.name = "WGT-" + rig_name + "_" + bone_name
+            widget_index.rename(wgt_name, moved.name)
+            if moved not in old_widgets:
+                old_widgets.append(moved)
+
+        # Build the widget once, under a name that is free now
+        kwlist = widgets_dict[self.widget]["kwargs"]
+        kwargs = {"rig": rig, "bone_name": first.name}
+        for kw in kwlist:
+            kwargs[kw] = getattr(self, kw)
+        default = self.kwargs_default(kwlist)
+        if not (default and create_library_widget(rig, first.name, self.widget)):
+            widgets_dict[self.widget]["function"](**kwargs)
+            # Only geometry built by this call may enter the library
+            if default and wgt_name in D.objects:
+                widget_library.add(self.widget, D.objects[wgt_name].data)
+        wgt_obj = D.objects.get(wgt_name)
+        if not wgt_obj:
+            if moved:
+                widget_index.rename(moved.name, wgt_name)
+                moved.name = wgt_name
+            for pb, shape in old_shapes:
+                pb.custom_shape = shape
+            self.report({'ERROR'}, "Widget " + self.widget + " could not be created")
+            return {'CANCELLED'}
+
+        # Assign to all bones, additional resizing via display scale if missing
+        scale = 1.0 if "size" in kwargs or "radius" in kwargs else self.size
+        for pb in pose_bones:
+            pb.custom_shape_scale = scale
+            pb.use_custom_shape_bone_size = True
+            pb.custom_shape = wgt_obj
+        for r in rigs:
+            widget_index.tag(r.name)
+
+        # Remove replaced widgets nothing holds anymore
+        for widget in old_widgets:
+            if not widget_in_use(widget):
+                D.objects.remove(widget)
 
         return {'FINISHED'}
     
+    def kwargs_default(self, kwlist):
+        """Check if all widget arguments are at their defaults, so the library shape applies"""
+        props = self.bl_rna.properties
+        return all(getattr(self, kw) == props[kw].default for kw in kwlist)
+
     def draw(self, context):
         layout = self.layout
         col = layout.column()
@@ -422,46 +463,68 @@ class BENDIFY_OT_WidgetsBevel(bpy.types.Operator, WidgetObjectsMixin):
     bevel_resolution: bpy.props.IntProperty(name="Resolution", default=2)
     use_fill_caps: bpy.props.BoolProperty(name="Fill Caps", default=True)
     use_smooth: bpy.props.BoolProperty(name="Smooth Curves", default=True)
+    preview: bpy.props.BoolProperty(
+        name="Preview Active Only",
+        default=False,
+        description="Only update the active widget while dragging, apply to all on confirm (P to toggle)"
+    )
 
     @classmethod
     def poll(cls, context):
         return context.mode == 'POSE' and context.selected_pose_bones
 
     def execute(self, context):
-        self.prepare_widgets(context)
+        if not getattr(self, 'widgets', None):
+            self.prepare_widgets(context)
         self.bevel()
         self.curve_settings()
-        self.curve_fix_remove()
-        self.cleanup_widgets(context)
-        self.collection_tmp_remove(col_name="Widgets_bevel")
-        context.window.cursor_modal_restore()
+        self.cleanup_widgets()
+        self.timer_remove(context)
+        if context.window:
+            context.window.cursor_modal_restore()
         return {'FINISHED'}
 
     def cancel(self, context):
-        for k, v in self.widgets.items():
-            bpy.data.objects[k].data.bevel_depth = v['depth']
-        self.curve_fix_remove()
-        self.cleanup_widgets(context)
-        self.collection_tmp_remove(col_name="Widgets_bevel")
+        for w, v in self.widgets.items():
+            w.data.bevel_depth = v['depth']
+            self.show(w, v['original'])
+        self.cleanup_widgets()
+        self.timer_remove(context)
         context.window.cursor_modal_restore()
 
+    def timer_remove(self, context):
+        if getattr(self, 'timer', None):
+            context.window_manager.event_timer_remove(self.timer)
+            self.timer = None
+
     def modal(self, context, event):
         if event.shift:
             self.precision = 10000
         else:
             self.precision = 1000
 
+        # Coalesce input, bevel is only updated once per timer tick
         if event.type == 'MOUSEMOVE' or event.type == 'LEFT_SHIFT':
             self.delta = (event.mouse_x - self.x_init) / self.precision
-            self.bevel()
-        
+            self.pending = True
+
+        elif event.type == 'TIMER':
+            if self.pending:
+                self.bevel(self.preview)
+                self.pending = False
+
         elif event.type == 'X':
             if event.value == 'PRESS':
                 if self.remove:
                     self.remove = False
                 else:
                     self.remove = True
-                self.bevel()
+                self.pending = True
+
+        elif event.type == 'P':
+            if event.value == 'PRESS':
+                self.preview = not self.preview
+                self.pending = True
 
         elif event.type == 'LEFTMOUSE':
             self.execute(context)
@@ -474,18 +537,9 @@ class BENDIFY_OT_WidgetsBevel(bpy.types.Operator, WidgetObjectsMixin):
         return {'RUNNING_MODAL'}
         
     def invoke(self, context, event):
-        widgets_obj = self.prepare_widgets(context)
-
-        # Store initial bevel depth and mouse position, set viewport fix
-        self.widgets = {}
-        for w in widgets_obj:
-            self.widgets[w.name] = {
-                'depth': w.data.bevel_depth,
-                'scale': w.scale
-            }
+        self.prepare_widgets(context)
 
         # Initial curve settings
-        self.curve_fix_add()
         self.curve_settings()
 
         # Setup modal values
@@ -493,8 +547,10 @@ class BENDIFY_OT_WidgetsBevel(bpy.types.Operator, WidgetObjectsMixin):
         self.delta = 0
         self.precision = 1000
         self.remove = False
+        self.pending = False
         
-        # Modal
+        # Modal, updates coalesced to the timer rate
+        self.timer = context.window_manager.event_timer_add(1 / 60, window=context.window)
         context.window.cursor_modal_set('SCROLL_X')
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
@@ -507,79 +563,94 @@ class BENDIFY_OT_WidgetsBevel(bpy.types.Operator, WidgetObjectsMixin):
         col.row().prop(self, 'bevel_resolution')
         col.row().prop(self, 'use_fill_caps')
         col.row().prop(self, 'use_smooth')
+        col.row().prop(self, 'preview')
         if self.remove:
             col.enabled = False
 
-    def bevel(self):
-        for k, v in self.widgets.items():
-            scale_avg = max((v['scale'][0] + v['scale'][1] + v['scale'][2]) / 3, 0.0001)
-            bpy.data.objects[k].data.bevel_depth = 0 if self.remove else abs(
-                v['depth'] + self.delta / scale_avg
-            )
+    def bevel(self, active_only=False):
+        widgets = [self.widget_active] if active_only and self.widget_active else self.widgets
+        for w in widgets:
+            v = self.widgets[w]
+            w.data.bevel_depth = 0 if self.remove else abs(v['depth'] + self.delta / v['scale'])
+            self.show(w)
 
     def curve_settings(self):
-        for widget in self.widgets:
-            w = bpy.data.objects[widget]
+        for w in self.widgets:
             w.data.bevel_resolution = self.bevel_resolution
             w.data.use_fill_caps = self.use_fill_caps
             for spline in w.data.splines:
                 spline.use_smooth = self.use_smooth
 
+    def show(self, curve, widget=None):
+        """Assign the curve to its bones while beveled, its mesh otherwise
+        """
+        v = self.widgets[curve]
+        if not widget:
+            if curve.data.bevel_depth > 0:
+                widget = curve
+            else:
+                if not v['mesh']:
+                    v['mesh'] = widget_curve_to_mesh(curve)
+                widget = v['mesh']
+        if v['shown'] is not widget:
+            D = bpy.data
+            for rig_name, bone_name in v['bones']:
+                D.objects[rig_name].pose.bones[bone_name].custom_shape = widget
+            v['shown'] = widget
+
     def prepare_widgets(self, context):
-        """Collect widgets
+        """Collect widgets and pair each with a curve and a mesh object
         """
         widgets_obj = self.widgets_from_pose_bones(context.selected_pose_bones)
-        self.collection_tmp_add(widgets_obj, col_name="Widgets_bevel")
-
-        # Convert to curves
-        widgets_mesh = [w for w in widgets_obj if not w.type == 'CURVE']
-        if widgets_mesh:
-            act = context.active_object
-            c = context.copy()
-            c['mode'] = 'OBJECT'
-            c['active_object'] = widgets_mesh[0]
-            c['selected_objects'] = widgets_mesh
-            bpy.ops.object.convert(c, target='CURVE')
-            context.view_layer.objects.active = act
-        
-        return widgets_obj
-    
-    def cleanup_widgets(self, context):
-        """Convert widgets back to mesh if there's no bevel
-        """
-        widgets_mesh = [
-            bpy.data.objects[w] for w in self.widgets \
-            if bpy.data.objects[w].data.bevel_depth <= 0
-        ]
-        if widgets_mesh:
-            act = context.active_object
-            c = context.copy()
-            c['mode'] = 'OBJECT'
-            c['active_object'] = widgets_mesh[0]
-            c['selected_objects'] = widgets_mesh
-            bpy.ops.object.convert(c, target='MESH')
-            context.view_layer.objects.active = act
-
-    def curve_fix_add(self):
-        """Add triangulate modifiers to fix zero bevel invisibility
-        """
-        for widget in self.widgets:
-            w = bpy.data.objects[widget]
-            if not any(m.name == "Viewport Fix" for m in w.modifiers):
-                tri = w.modifiers.new(name="Viewport Fix", type='TRIANGULATE')
-                tri.quad_method = 'FIXED'
-                tri.ngon_method = 'CLIP'
-                tri.min_vertices = 128
-
-    def curve_fix_remove(self):
-        """Remove triangulate modifiers if bevel > 0
+
+        # Store initial bevel depth, scale and users from one live scan, deletes follow from it
+        users = widget_users_scan({w.name for w in widgets_obj})
+        self.widgets = {}
+        for w in widgets_obj:
+            if w.type == 'CURVE':
+                curve, mesh = w, None
+            elif w.type == 'MESH':
+                curve, mesh = widget_mesh_to_curve(w), w
+            else:
+                continue
+            self.widgets[curve] = {
+                'depth': curve.data.bevel_depth,
+                'scale': max(sum(w.scale) / 3, 0.0001),
+                'original': w,
+                'mesh': mesh,
+                'shown': w,
+                'bones': users.get(w.name, []),
+            }
+
+        widget_active = attribute_return(context, ['active_pose_bone', 'custom_shape'])
+        self.widget_active = next((c for c, v in self.widgets.items() if v['original'] == widget_active), None)
+        if not self.widget_active and self.widgets:
+            self.widget_active = next(iter(self.widgets))
+
+    def cleanup_widgets(self):
+        """Keep the shown object of every widget under its original name, remove the other
         """
-        for widget in self.widgets:
-            w = bpy.data.objects[widget]
-            if w.data.bevel_depth > 0:
-                for mod in w.modifiers:
-                    if mod.name == "Viewport Fix":
-                        w.modifiers.remove(mod)
+        D = bpy.data
+        for curve, v in self.widgets.items():
+            name = v['original'].name
+            keep = v['shown']
+            drop = v['mesh'] if keep is curve else curve
+            if drop:
+                # Users were scanned live at invoke and already show the kept widget
+                data = drop.data
+                is_mesh = drop.type == 'MESH'
+                D.objects.remove(drop)
+                if not data.users:
+                    if is_mesh:
+                        D.meshes.remove(data)
+                    else:
+                        D.curves.remove(data)
+            if keep.type == 'MESH':
+                keep.data.use_fake_user = False
+            keep.name = name
+            for rig_name, bone_name in v['bones']:
+                widget_index.tag(rig_name)
+        self.widgets = {}
 
 
 class BENDIFY_OT_WidgetsEditStart(bpy.types.Operator, WidgetEditMixin, WidgetObjectsMixin):
@@ -610,6 +681,10 @@ class BENDIFY_OT_WidgetsEditStart(bpy.types.Operator, WidgetEditMixin, WidgetObj
         # Save active pose bone widget...
         widget_active = attribute_return(context, ['active_pose_bone', 'custom_shape'])
         
+        # Edit own copies of shared widget meshes
+        for widget in widgets:
+            unshare_widget_mesh(widget)
+
         bpy.ops.object.mode_set(mode='OBJECT')
         bpy.ops.object.select_all(action='DESELECT')
         self.collection_tmp_add(widgets)
@@ -701,7 +776,9 @@ class BENDIFY_OT_WidgetsNamesFix(bpy.types.Operator, WidgetNamesMixin):
             name_new = "WGT-" + v["rig"].name + "_" + v["bone"].name
             if not v["multi"]:
                 if not w.name == name_new:
+                    name_old = w.name
                     w.name = name_new
+                    widget_index.rename(name_old, w.name)
                     print(w.name + " renamed to " + name_new)
                     changes += 1
                 if self.position:
@@ -724,16 +801,67 @@ class BENDIFY_OT_WidgetsRemoveUnused(bpy.types.Operator, WidgetNamesMixin):
     def execute(self, context):
         D = bpy.data
         deletes = 0
-        widgets = self.collect_widgets()
-        for obj in D.objects:
-            if obj.name.startswith("WGT-") and not obj in widgets.keys():
-                print(obj.name + " deleted.")
-                D.objects.remove(obj)
-                deletes += 1
+        # Deleting is only safe on a live scan, the index misses bones changed outside the depsgraph
+        for obj in widget_orphans():
+            print(obj.name + " deleted.")
+            D.objects.remove(obj)
+            deletes += 1
         self.report({'INFO'}, str(deletes) + " unused widgets removed")
         return {'FINISHED'}
 
 
+class BENDIFY_OT_WidgetsExport(bpy.types.Operator, ExportHelper):
+    """Export the mesh widgets of the active armature's bones as a widget set"""
+    bl_idname = "pose.widgets_export"
+    bl_label = "Export Widget Set"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    pattern: bpy.props.StringProperty(name="Bones", default="*", description="Bone name pattern to export")
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.type == 'ARMATURE'
+
+    def execute(self, context):
+        exported, skipped = widget_set_export(context.object, self.filepath, self.pattern)
+        message = str(exported) + " bone widgets exported"
+        if skipped:
+            message += ", " + str(skipped) + " non-mesh widgets skipped"
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+
+class BENDIFY_OT_WidgetsImport(bpy.types.Operator, ImportHelper):
+    """Apply a widget set to the bones of the active armature with matching names"""
+    bl_idname = "pose.widgets_import"
+    bl_label = "Import Widget Set"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    pattern: bpy.props.StringProperty(name="Bones", default="*", description="Bone name pattern to import")
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.type == 'ARMATURE'
+
+    def execute(self, context):
+        obj = context.object
+        try:
+            count, broken = widget_set_import(obj, self.filepath, self.pattern)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, "Invalid widget set: " + str(e))
+            return {'CANCELLED'}
+        widget_index.tag(obj.name)
+        if broken:
+            self.report({'WARNING'}, str(count) + " bone widgets imported, " + str(len(broken)) + " shapes changed on import")
+        else:
+            self.report({'INFO'}, str(count) + " bone widgets imported")
+        return {'FINISHED'}
+
+
 class BENDIFY_OT_AddBoneGroups(bpy.types.Operator):
     bl_idname = "armature.bendify_add_bone_groups"
     bl_label = "Add Bendify Bone Groups"
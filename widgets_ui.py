@@ -9,6 +9,14 @@ class BendifyWidgetsPanel():
         row = col.row(align=True)
         row.operator('scene.widgets_names_fix', text="Fix Names", icon='BOLD')
         row.operator('scene.widgets_remove_unused', text="Clean", icon='X')
+        row = col.row(align=True)
+        row.operator('pose.widgets_export', text="Export", icon='EXPORT')
+        row.operator('pose.widgets_import', text="Import", icon='IMPORT')
+        row = col.row(align=True)
+        row.prop(context.scene.bendify, 'widgets_lod', text="Playback LOD", icon='PLAY')
+        sub = row.row(align=True)
+        sub.active = context.scene.bendify.widgets_lod
+        sub.prop(context.scene.bendify, 'widgets_lod_cells')
         col.row().separator()
 
         if context.mode == 'POSE':